@@ -0,0 +1,232 @@
+import asyncio
+import logging
+
+from .async_client import AsyncClient
+from .base import Base
+from .cache import _field_names
+from .fields import Field
+from .formulas import UnsupportedFormula
+from .model_list import _linked_ids, _prefetch_fields, _prefetch_tree
+
+
+class AsyncBase(Base):
+    """Base fetching records without blocking the event loop, for asyncio
+    applications.
+
+    Models are generated from the schema just like for `airstorm.base.Base`.
+    Records are fetched by awaiting the methods of the base, which cache them, after
+    which their fields are read from the cache as usual. Independent fetches run
+    concurrently on a pool of connections, within the rate limit of the base.
+
+    Example:
+        >>> async with AsyncBase(base_id, api_key, schema) as base:
+        ...     smoothies = await base.find(base.Smoothy, "{Price} > 5")
+        ...     await base.prefetch(smoothies, "fruits")
+        ...     names = smoothies.fruits
+
+    Accessing records or linked records that were not fetched still works but
+    blocks the event loop, as do indexed tables when their models are generated.
+
+    Args:
+        base_id (str): The id of the Airtable base.
+        api_key (str): The API key of the user that will connect the base.
+        schema (str): A dictionary representing the schema.
+        **kwargs: The arguments of `airstorm.base.Base`.
+    """
+
+    def __init__(self, base_id: str, api_key: str, schema: dict, **kwargs):
+        Base.__init__(self, base_id, api_key, schema, **kwargs)
+        self._async_client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the pooled connections of the base."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    async def get(self, model, record_id: str):
+        """Get a record, fetching it unless it is cached.
+
+        Args:
+            model (airstorm.model.Model): The model of the record.
+            record_id (str): The id of the record.
+
+        Returns:
+            airstorm.model.Model: The record, which is falsy if it does not exist.
+        """
+        # pylint: disable=protected-access
+        cache = model._cache
+        if record_id and not cache.fresh(record_id):
+            cache._metrics.misses += 1
+            cache._metrics.gets += 1
+            data = await self._client_async().get(model._id, record_id)
+            if data is None:
+                logging.warning("Record {} was not found.".format(record_id))
+            else:
+                cache._metrics.records += 1
+            cache[record_id] = data or {}
+        return model(record_id)
+
+    async def find(self, model, formula="", fields=None):
+        """Return records matching a formula.
+
+        Args:
+            model (airstorm.model.Model): The model of the records.
+            formula (str, optional): A airtable formula to filter the search.
+            fields (list, optional): The fields or field names to download, all of
+                them if omitted.
+
+        Returns:
+            airstorm.model_list.ModelList: The found records.
+        """
+        # pylint: disable=protected-access
+        cache = model._cache
+        records = None
+        if model._indexed:
+            try:
+                records = cache._select_locally(formula) if formula else cache
+            except UnsupportedFormula as error:
+                logging.info("Selecting on Airtable instead: {}".format(error))
+        if records is None:
+            names = _field_names(fields) if fields else None
+            records = await self._fetch(model, formula=formula, fields=names)
+        model_list = self._model_list_by_id[model._id]
+        return model_list(*[model(_) for _ in list(records)])
+
+    async def fetch_many(self, model, ids, fields=None):
+        """Fetch the records that are not cached, or lack some fields, in as few
+        concurrent requests as possible.
+
+        Args:
+            model (airstorm.model.Model): The model of the records.
+            ids (collections.abc.Iterable): The ids of the records.
+            fields (list, optional): The fields or field names the records should
+                hold, all of them if omitted.
+
+        Returns:
+            dict: The records fetched.
+        """
+        # pylint: disable=protected-access
+        cache = model._cache
+        names = _field_names(fields) if fields else None
+        ids = [_ for _ in dict.fromkeys(ids) if _]
+        missing = [_ for _ in ids if not cache.fresh(_)]
+        fetches = [self._fetch(model, formula=_) for _ in cache.id_formulas(missing)]
+        if names:
+            # Records fetched with a projection that lacks some of the fields.
+            incomplete = [
+                id_
+                for id_ in ids
+                if cache.fresh(id_) and not all(cache.holds(id_, _) for _ in names)
+            ]
+            fetches += [
+                self._fetch(model, formula=_, fields=names)
+                for _ in cache.id_formulas(incomplete, names)
+            ]
+        results = await asyncio.gather(*fetches)
+        fetched = {}
+        for result in results:
+            fetched.update(result)
+        for id_ in missing:
+            if id_ not in fetched:
+                logging.warning("Record {} was not found.".format(id_))
+                cache[id_] = {}
+        return fetched
+
+    async def prefetch(self, records, *paths):
+        """Fetch the records linked to records along paths of linked fields. Each
+        hop costs one batch of concurrent requests, and independent paths are
+        fetched concurrently.
+
+        Args:
+            records (airstorm.model_list.ModelList): The records.
+            *paths (str): Paths of field attribute names separated by dots. All
+                fields but the last must be linked record fields.
+
+        Raises:
+            ValueError: A path does not go through linked record fields.
+
+        Returns:
+            airstorm.model_list.ModelList: The records.
+        """
+        # pylint: disable=protected-access
+        await self._prefetch(records._model, list(records), _prefetch_tree(paths))
+        return records
+
+    async def resolve(self, record, field):
+        """Return the records linked to a record, fetching the ones that are not
+        cached.
+
+        Args:
+            record (airstorm.model.Model): The record.
+            field (airstorm.fields.Field, str): The linked record field, or its
+                attribute name.
+
+        Returns:
+            airstorm.model.Model, airstorm.model_list.ModelList: The linked record
+                or records.
+        """
+        # pylint: disable=protected-access
+        if not isinstance(field, Field):
+            field = getattr(type(record), field)
+        await self._prefetch(type(record), [record], {field._attribute_name: {}})
+        return getattr(record, field._attribute_name)
+
+    async def _prefetch(self, model, records, tree):
+        # pylint: disable=protected-access
+        fields = _prefetch_fields(model, tree)
+        ids = [_._record_id for _ in records]
+        await self.fetch_many(model, ids, fields=list(fields))
+        hops = []
+        for field, subtree in fields.items():
+            if field._schema["type"] == "foreignKey":
+                linked_model, linked_ids = _linked_ids(field, records)
+                hops.append(self._hop(linked_model, linked_ids, subtree))
+        await asyncio.gather(*hops)
+
+    async def _hop(self, model, ids, tree):
+        # pylint: disable=protected-access
+        if not model._indexed:
+            await self.fetch_many(model, ids)
+        if tree:
+            records = [model(_) for _ in ids]
+            await self._prefetch(model, [_ for _ in records if _], tree)
+
+    async def _fetch(self, model, formula="", fields=None):
+        """Fetch the records matching a formula and cache them.
+
+        Returns:
+            dict: The records fetched.
+        """
+        # pylint: disable=protected-access
+        cache = model._cache
+        cache._metrics.lists += 1
+        records = await self._client_async().get_all(
+            model._id, formula=formula, fields=fields
+        )
+        cache._metrics.records += len(records)
+        return {_["id"]: cache._store(_, fields) for _ in records}
+
+    def _client_async(self):
+        """Return the client of the base, creating it on first use so that it
+        belongs to the running event loop.
+
+        Returns:
+            airstorm.async_client.AsyncClient: The client.
+        """
+        if self._async_client is None:
+            self._async_client = AsyncClient(
+                self._id,
+                self._api_key,
+                self._scheduler,
+                self._metrics,
+                api_url=self._api_url,
+                max_connections=self._workers,
+            )
+        return self._async_client
@@ -0,0 +1,120 @@
+import time
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class AsyncClient:
+    """Non-blocking Airtable client sharing a pool of connections between all the
+    tables of a base. Requests go through the scheduler of the base so that they
+    stay within the Airtable rate limit, and are recorded in its metrics.
+
+    Args:
+        base_id (str): The id of the base.
+        api_key (str): The API key of the user.
+        scheduler (airstorm.scheduler.Scheduler): The request scheduler of the base.
+        metrics (airstorm.metrics.Metrics): The metrics of the base.
+        api_url (str, optional): The URL of the Airtable API.
+        max_connections (int, optional): The maximum amount of open connections.
+        timeout (float, optional): The timeout of requests in seconds.
+    """
+
+    def __init__(
+        self,
+        base_id: str,
+        api_key: str,
+        scheduler,
+        metrics,
+        api_url="https://api.airtable.com/v0",
+        max_connections=10,
+        timeout=None,
+    ):
+        object.__init__(self)
+        if httpx is None:
+            raise ImportError(
+                "The httpx package is required, install airstorm[async] to get it."
+            )
+        self._scheduler = scheduler
+        self._metrics = metrics
+        self._session = httpx.AsyncClient(
+            base_url="{}/{}/".format(api_url.rstrip("/"), base_id),
+            headers={"Authorization": "Bearer {}".format(api_key)},
+            limits=httpx.Limits(max_connections=max_connections),
+            timeout=timeout,
+        )
+
+    async def get(self, table_id: str, record_id: str):
+        """Get a record.
+
+        Args:
+            table_id (str): The id of the table.
+            record_id (str): The id of the record.
+
+        Returns:
+            dict: The record data, or None if the record does not exist.
+        """
+        try:
+            return await self._request(table_id, "{}/{}".format(table_id, record_id))
+        except httpx.HTTPStatusError as error:
+            if error.response.status_code == 404:
+                return None
+            raise
+
+    async def get_all(self, table_id: str, formula="", fields=None, page_size=100):
+        """Get all the records matching a formula, following pagination.
+
+        Args:
+            table_id (str): The id of the table.
+            formula (str, optional): A airtable formula to filter the records.
+            fields (list, optional): The names of the fields to get, all of them if
+                omitted.
+            page_size (int, optional): The amount of records per request, up to 100.
+
+        Returns:
+            list: The records data.
+        """
+        params = {"pageSize": page_size}
+        if formula:
+            params["filterByFormula"] = formula
+        if fields:
+            params["fields[]"] = list(fields)
+        records = []
+        while True:
+            data = await self._request(table_id, table_id, params=params)
+            records.extend(data.get("records", []))
+            offset = data.get("offset")
+            if not offset:
+                return records
+            params = dict(params, offset=offset)
+
+    async def aclose(self):
+        """Close the pooled connections."""
+        await self._session.aclose()
+
+    async def _request(self, table_id, url, params=None):
+        table_metrics = self._metrics.table(table_id)
+        attempt = 0
+        while True:
+            await self._scheduler.acquire_async()
+            start = time.perf_counter()
+            try:
+                response = await self._session.get(url, params=params)
+            except httpx.TransportError as error:
+                if not self._scheduler.retry(error, attempt, connection_error=True):
+                    raise
+                attempt += 1
+                continue
+            self._metrics.record_request(
+                table_metrics,
+                "get",
+                response.status_code,
+                time.perf_counter() - start,
+                len(response.content),
+            )
+            if response.status_code < 400:
+                return response.json()
+            if not self._scheduler.retry(response.status_code, attempt):
+                response.raise_for_status()
+            attempt += 1
@@ -1,13 +1,25 @@
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
 from .model import Model
 from .model_list import ModelList
+from .client import Client
+from .metrics import Metrics
 from .functions import to_singular_pascal_case
+from .scheduler import Scheduler
+from .schemas import compile_table, is_compiled
+from .snapshots import Snapshot, write_snapshot
+from .transports import HttpTransport
 
 
 class Base:
     """The base class is the root object to access the airtable bases.
 
-    During initialization the instance will be filled with attribute point to the
-    different models available in the database.
+    The instance exposes attributes pointing to the different models available in
+    the database. Model classes, their fields and caches are only generated when
+    first accessed, so that large bases initialize quickly.
 
     Args:
         base_id (str): The id of the Airtable base.
@@ -17,10 +29,14 @@ class Base:
             Use the following Gist to generate to generate the schema manually:
             https://gist.github.com/douglaslassance/0ba26f2cf2aa9bb21a521ba07d751244
 
+            Schemas compiled with `airstorm.schemas.compile_schema` hold all the
+            names derived from the schema, which makes initializing faster.
+
         to_model_name (callable, optional): Transform table into model class names.
 
             By default it will PascalCase and singularize the name of the tables,
             but this argurment provide users with potentially desired flexibility.
+            Ignored for compiled schemas, which hold the model names already.
 
         indexed_tables (list, collections.abc.Iterable): List of table names to
             index immediatly.
@@ -30,6 +46,61 @@ class Base:
             ever need to hit the airtable for any record of this table. This is a
             fit optimization for tables with little records and that do not change
             often.
+
+        store (airstorm.stores.Store, optional): A persistent store for indexed
+            tables.
+
+            Indexed tables are loaded from the store when it holds a fresh copy of
+            them, which spares downloading them again on every process start.
+            Processes sharing a store download each indexed table once, and
+            records of other tables too when the store shares records.
+
+        index_workers (int, optional): The amount of indexed tables to download
+            concurrently. All downloads still share the rate limit of the base.
+
+        background_indexing (bool, optional): Download indexed tables in the
+            background instead of waiting for them during initialization.
+
+            Models of indexed tables wait for their table to be downloaded when
+            first accessed. Use `wait_indexed` to wait for all of them.
+
+        rate_limit (float, optional): The maximum amount of requests per second
+            made to the base.
+
+        scheduler (airstorm.scheduler.Scheduler, optional): The scheduler all the
+            requests to the base go through. Use it to tune retries and burst.
+            Overrides `rate_limit` when provided.
+
+        workers (int, optional): The maximum amount of concurrent requests made by
+            batch operations such as pushing records.
+
+        last_modified_fields (dict, optional): The name of a last modified time
+            field by table name.
+
+            Refreshing indexed tables fetches the records modified since the last
+            refresh using this field, or the LAST_MODIFIED_TIME() of records for
+            tables that do not have one.
+
+        cache_policy (airstorm.policies.CachePolicy, optional): The policy bounding
+            the memory used by the cache of each table and the time their records
+            stay fresh.
+
+            Records of indexed tables are never evicted and never expire.
+
+        cache_policies (dict, optional): Cache policies by table name, overriding
+            `cache_policy` for these tables.
+
+        snapshot (str, optional): The path of a snapshot file to load, see
+            `load_snapshot`. Indexed tables it holds are not downloaded.
+
+        api_url (str, optional): The URL of the Airtable API, for instance to test
+            against a local server.
+
+        transport (airstorm.transports.Transport, optional): The transport all the
+            requests of the base are sent with. Defaults to an
+            `airstorm.transports.HttpTransport` sharing a pool of keep-alive
+            connections between all the tables. Use other transports to tune the
+            pool and timeouts, or to test offline.
     """
 
     def __init__(
@@ -39,30 +110,351 @@ class Base:
         schema: dict,
         to_model_name=to_singular_pascal_case,
         indexed_tables=None,
+        store=None,
+        index_workers=1,
+        background_indexing=False,
+        rate_limit=5.0,
+        scheduler=None,
+        workers=4,
+        last_modified_fields=None,
+        cache_policy=None,
+        cache_policies=None,
+        snapshot=None,
+        api_url="https://api.airtable.com/v0",
+        transport=None,
     ):
         object.__init__(self)
 
         self._id = base_id
         self._api_key = api_key
+        self._api_url = api_url
+        self._transport = transport or HttpTransport(api_key)
+        # Names derived from the schema by table id, compiled when first needed.
+        self._compiled_tables = {}
+        if is_compiled(schema):
+            self._compiled_tables = schema["tables"]
+            schema = schema["schema"]
         self._schema = schema
-        self._model_by_id = {}
-        self._model_list_by_id = {}
-        self._hits = 0
+        # Tables whose classes are generated and indexed, and the ones being loaded.
+        self._loaded_tables = set()
+        self._loading_tables = {}
+        self._load_lock = threading.RLock()
+        self._model_by_id = _Registry(self._load_table)
+        self._model_list_by_id = _Registry(self._load_table)
+        self._metrics = Metrics()
+        self._store = store
+        self._scheduler = scheduler or Scheduler(rate=rate_limit)
+        self._index_futures = {}
+        self._workers = workers
+        self._last_modified_fields = last_modified_fields or {}
+        self._default_cache_policy = cache_policy
+        self._cache_policies = cache_policies or {}
+        # Snapshot records of tables whose models are not generated yet.
+        self._snapshot_tables = {}
 
+        # Models are only generated when first accessed. Until then we only keep
+        # track of which table each model name points to.
+        self._indexed_tables = set(indexed_tables or [])
+        self._table_schema_by_id = {}
+        self._model_name_by_id = {}
+        self._table_id_by_name = {}
         for table_schema in self._schema["tables"]:
-            table_name = table_schema["name"]
-            model_name = to_model_name(table_schema["name"])
-            model_dict = {
-                "_schema": table_schema,
-                "_base": self,
-                "_indexed": table_name in (indexed_tables or []),
-            }
-            model = Model(model_name, (), model_dict)
-            setattr(self, model_name, model)
-            model_list_name = model_name + "List"
-            model_list_dict = {"_model": model}
-            setattr(
-                self,
-                model_list_name,
-                ModelList(model_list_name, (list,), model_list_dict),
+            table_id = table_schema["id"]
+            compiled_table = self._compiled_tables.get(table_id)
+            if compiled_table:
+                model_name = compiled_table["model_name"]
+            else:
+                model_name = to_model_name(table_schema["name"])
+            self._table_schema_by_id[table_id] = table_schema
+            self._model_name_by_id[table_id] = model_name
+            self._table_id_by_name[model_name] = table_id
+            self._table_id_by_name[model_name + "List"] = table_id
+
+        if snapshot:
+            self.load_snapshot(snapshot)
+
+        # Indexed tables are loaded right away as promised.
+        indexed_ids = [
+            table_schema["id"]
+            for table_schema in self._schema["tables"]
+            if table_schema["name"] in self._indexed_tables
+            and table_schema["id"] not in self._snapshot_tables
+        ]
+        if indexed_ids and (index_workers > 1 or background_indexing):
+            executor = ThreadPoolExecutor(max_workers=index_workers)
+            for table_id in indexed_ids:
+                self._index_futures[table_id] = executor.submit(
+                    self._download, table_id
+                )
+            executor.shutdown(wait=False)
+        if not background_indexing:
+            for table_id in indexed_ids:
+                self._load_table(table_id)
+
+    def __getattr__(self, name):
+        table_id = self.__dict__.get("_table_id_by_name", {}).get(name)
+        if table_id is None:
+            raise AttributeError(
+                "'{}' object has no attribute '{}'".format(type(self).__name__, name)
             )
+        self._load_table(table_id)
+        return self.__dict__[name]
+
+    def __dir__(self):
+        return sorted(set(object.__dir__(self)) | set(self._table_id_by_name))
+
+    @property
+    def _hits(self):
+        """int: The total amount of gets and lists asked to Airtable."""
+        return self._metrics.operations
+
+    @property
+    def metrics(self):
+        """airstorm.metrics.Metrics: The performance metrics of the base tables."""
+        return self._metrics
+
+    @property
+    def scheduler(self):
+        """airstorm.scheduler.Scheduler: The scheduler of the requests to the base.
+        Its stats expose the queue depth and the time spent waiting."""
+        return self._scheduler
+
+    def wait_indexed(self, timeout=None):
+        """Wait for the indexed tables being downloaded in the background.
+
+        Args:
+            timeout (float, optional): The maximum amount of seconds to wait.
+
+        Returns:
+            bool: Whether all indexed tables are downloaded.
+        """
+        _, not_done = wait(list(self._index_futures.values()), timeout=timeout)
+        return not not_done
+
+    def sync(self):
+        """Refresh the indexed tables that are loaded, only fetching the records
+        that changed since they were last downloaded or refreshed.
+        """
+        for table_id, model in list(self._model_by_id.items()):
+            if model._indexed and table_id in self._loaded_tables:
+                model.refresh()
+
+    def export_snapshot(self, path: str):
+        """Save the records cached for all the tables to a compact binary snapshot
+        file, to be loaded back by `load_snapshot`. Records fetched with a field
+        projection are partial and are left out.
+
+        Args:
+            path (str): The path of the snapshot file.
+        """
+        records_by_table = {}
+        for table_id, model in list(self._model_by_id.items()):
+            cache = model._cache
+            cache._load_snapshot()
+            records_by_table[table_id] = [
+                record
+                for id_, record in dict.items(cache)
+                if record and id_ not in cache._projections
+            ]
+        write_snapshot(path, records_by_table)
+
+    def load_snapshot(self, path: str):
+        """Load the records of a snapshot file saved by `export_snapshot`, replacing
+        the cached ones.
+
+        The file is memory-mapped and records are only decoded when first accessed,
+        so loading is nearly instant and memory is only used for the records
+        actually accessed. Indexed tables loaded from a snapshot are not downloaded.
+
+        Args:
+            path (str): The path of the snapshot file.
+        """
+        snapshot = Snapshot(path)
+        for table_id, table in snapshot.tables.items():
+            if table_id not in self._table_schema_by_id:
+                continue
+            model = dict.get(self._model_by_id, table_id)
+            if model is None:
+                self._snapshot_tables[table_id] = table
+            else:
+                model._cache.attach_snapshot(table)
+
+    def _cache_policy(self, table_name: str):
+        """Return the cache policy of a table.
+
+        Args:
+            table_name (str): The name of the table.
+
+        Returns:
+            airstorm.policies.CachePolicy: The policy, or None if unbounded.
+        """
+        return self._cache_policies.get(table_name, self._default_cache_policy)
+
+    def _client(self, table_id: str):
+        """Create an Airtable client for a table of this base.
+
+        Args:
+            table_id (str): The id of the table.
+
+        Returns:
+            airstorm.client.Client: The client.
+        """
+        name = self._table_schema_by_id[table_id]["name"]
+        self._metrics.table(table_id, name)
+        return Client(
+            self._id,
+            table_id,
+            self._transport,
+            self._scheduler,
+            self._metrics,
+            api_url=self._api_url,
+        )
+
+    def _download(self, table_id: str):
+        """Get all the records of a table, from the store if it holds a fresh copy
+        of it or from Airtable otherwise.
+
+        Args:
+            table_id (str): The id of the table.
+
+        Returns:
+            tuple: The records, whether they were downloaded from Airtable and the
+                time they are up to date with.
+        """
+        if not self._store:
+            synced_at = time.time()
+            return self._client(table_id).get_all(), True, synced_at
+        # Processes starting together wait for the first one to download the table
+        # and then load it from the store.
+        with self._store.lock(self._id, table_id):
+            records = self._store.load(self._id, table_id)
+            if records is not None:
+                return records, False, self._store.saved_at(self._id, table_id)
+            synced_at = time.time()
+            records = self._client(table_id).get_all()
+            self._store.save(self._id, table_id, records)
+        return records, True, synced_at
+
+    def _load_table(self, table_id: str):
+        """Generate the model and model list classes of a table, and index it if
+        needed.
+
+        Classes are generated one table at a time, while indexed tables download
+        concurrently. Threads needing a table another thread is loading wait for it.
+
+        Args:
+            table_id (str): The id of the table.
+
+        Raises:
+            RuntimeError: The classes of the table are being generated by this
+                thread and cannot be used yet.
+        """
+        if table_id in self._loaded_tables:
+            return
+        while True:
+            with self._load_lock:
+                if table_id in self._loaded_tables:
+                    return
+                loading = self._loading_tables.get(table_id)
+                if loading is None:
+                    loading = self._loading_tables[table_id] = _Loading()
+                    try:
+                        model = self._generate_classes(table_id)
+                    except BaseException:
+                        self._unload_table(table_id, loading)
+                        raise
+                    loading.generated = True
+                    break
+            if loading.thread != threading.get_ident():
+                loading.done.wait()
+                continue
+            # The table is referred to while being loaded by this thread.
+            if not loading.generated:
+                raise RuntimeError(
+                    "The classes of table {} are being generated.".format(table_id)
+                )
+            return
+        try:
+            if model._indexed:
+                model._cache.index()
+        except BaseException:
+            with self._load_lock:
+                self._unload_table(table_id, loading)
+            raise
+        with self._load_lock:
+            self._loaded_tables.add(table_id)
+            del self._loading_tables[table_id]
+        loading.done.set()
+
+    def _unload_table(self, table_id: str, loading):
+        """Forget the classes of a table that failed to load, so that loading it
+        can be attempted again.
+
+        Args:
+            table_id (str): The id of the table.
+            loading (airstorm.base._Loading): The loading of the table.
+        """
+        model_name = self._model_name_by_id[table_id]
+        dict.pop(self._model_by_id, table_id, None)
+        dict.pop(self._model_list_by_id, table_id, None)
+        self.__dict__.pop(model_name, None)
+        self.__dict__.pop(model_name + "List", None)
+        del self._loading_tables[table_id]
+        loading.done.set()
+
+    def _generate_classes(self, table_id: str):
+        """Generate the model and model list classes of a table, while holding the
+        load lock.
+
+        Args:
+            table_id (str): The id of the table.
+
+        Returns:
+            airstorm.model.Model: The model.
+        """
+        table_schema = self._table_schema_by_id[table_id]
+        model_name = self._model_name_by_id[table_id]
+        compiled_table = self._compiled_tables.get(table_id)
+        if not compiled_table:
+            compiled_table = compile_table(table_schema, model_name)
+        model_dict = {
+            "_schema": table_schema,
+            "_base": self,
+            "_indexed": table_schema["name"] in self._indexed_tables,
+            "_attribute_names": compiled_table["attribute_names"],
+            "_list_attribute_names": compiled_table["list_attribute_names"],
+            "_primary_attribute_name": compiled_table["primary_attribute_name"],
+        }
+        model = Model(model_name, (), model_dict)
+        setattr(self, model_name, model)
+        model_list_name = model_name + "List"
+        model_list_dict = {"_model": model}
+        setattr(
+            self,
+            model_list_name,
+            ModelList(model_list_name, (list,), model_list_dict),
+        )
+        return model
+
+
+class _Loading:
+    """The loading of a table by a thread."""
+
+    def __init__(self):
+        object.__init__(self)
+        self.thread = threading.get_ident()
+        self.generated = False
+        self.done = threading.Event()
+
+
+class _Registry(dict):
+    """Dictionary of classes by table id that generates classes on first access.
+    Classes being generated by another thread are waited for."""
+
+    def __init__(self, load):
+        dict.__init__(self)
+        self._load = load
+
+    def __getitem__(self, key):
+        self._load(key)
+        return dict.__getitem__(self, key)
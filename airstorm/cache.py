@@ -1,8 +1,20 @@
+import contextlib
+import datetime
+import heapq
 import logging
+import queue
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 
-from airtable import Airtable
 from requests.exceptions import HTTPError
 
+from .formulas import UnsupportedFormula, compile_formula, is_true
+from .functions import chunked
+from .indexes import FieldIndex, SortedFieldIndex
+
 
 class Cache(dict):
     """A cache instance live on each model and is used by other classes to access
@@ -16,33 +28,266 @@ class Cache(dict):
         indexed (bool, optional): Will index the enitire table on initialization.
     """
 
+    # Maximum amount of record ids resolved by a single request, a page of results.
+    _batch_size = 100
+    # Maximum length of request URLs, Airtable rejects URLs over 16,000 characters.
+    _max_url_length = 16000
+    # Maximum amount of records Airtable creates, updates or deletes per request.
+    _write_batch_size = 10
+    # Seconds subtracted from the refresh watermark to account for clock skew.
+    _sync_margin = 60
+
     def __init__(self, model):
 
         dict.__init__(self)
         self._model = model
-        self._airtable = Airtable(
-            self._model._base._id, model._id, self._model._base._api_key
-        )
-        if model._indexed:
-            self._model._base._hits += 1
-            records = self._airtable.get_all()
-            for record in records:
-                self[record["id"]] = record
+        self._pending = {}
+        self._deferring = 0
+        self._formulas = {}
+        self._field_indexes = {}
+        self._synced_at = None
+        # Indexed tables are pinned, evicting records would break selects.
+        policy = self._model._base._cache_policy(model._name)
+        self._lru = policy.tracker() if policy and not model._indexed else None
+        # Indexed tables are kept fresh by refreshing them instead.
+        self._ttl = policy.ttl if policy and not model._indexed else None
+        self._negative_ttl = policy.negative_ttl if policy else None
+        if self._negative_ttl is None:
+            self._negative_ttl = self._ttl
+        self._expiry = {}
+        self._expiry_heap = []
+        # Names of the fields held by records fetched with a projection.
+        self._projections = {}
+        # Records of a loaded snapshot, until they are first accessed.
+        self._snapshot = self._model._base._snapshot_tables.pop(model._id, None)
+        self._airtable = self._model._base._client(model._id)
+        self._metrics = self._model._base._metrics.table(model._id)
+        # Store sharing the records fetched with other processes.
+        store = self._model._base._store
+        shared = store and store.shares_records and not model._indexed
+        self._shared = store if shared else None
+        # Guards the records along with their indexes and bookkeeping. Requests are
+        # sent without holding it.
+        self._lock = threading.RLock()
+        # Fetches in progress by record id, or by select arguments.
+        self._flights = {}
+
+    def index(self):
+        """Cache the entire table. Records are loaded from the base store when it
+        holds a fresh copy of the table, otherwise they are downloaded and saved to
+        the store.
+        """
+        base = self._model._base
+        # The table might already be downloading in the background.
+        future = base._index_futures.pop(self._model._id, None)
+        if self._snapshot is not None:
+            # Records are loaded from the snapshot instead.
+            return
+        if future:
+            records, downloaded, self._synced_at = future.result()
+        else:
+            records, downloaded, self._synced_at = base._download(self._model._id)
+        if downloaded:
+            self._metrics.lists += 1
+            self._metrics.records += len(records)
+        for record in records:
+            self[record["id"]] = record
+
+    def refresh(self):
+        """Update an indexed table with the records modified since it was last
+        downloaded or refreshed, and drop the records that were deleted since.
+
+        Deleted records are found by listing the ids of all records while only
+        downloading a single field of each.
+
+        Raises:
+            ValueError: The table is not indexed.
+
+        Returns:
+            dict: The records modified.
+        """
+        if not self._model._indexed:
+            raise ValueError("Only indexed tables can be refreshed.")
+        self._load_snapshot()
+        base = self._model._base
+        field = base._last_modified_fields.get(self._model._name)
+        since = datetime.datetime.fromtimestamp(
+            (self._synced_at or 0) - self._sync_margin, datetime.timezone.utc
+        ).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        expression = "{{{}}}".format(field) if field else "LAST_MODIFIED_TIME()"
+        synced_at = time.time()
+        modified = self._fetch(formula="IS_AFTER({}, '{}')".format(expression, since))
+
+        self._metrics.lists += 1
+        id_field = field or self._model._primary_field
+        ids = {_["id"] for _ in self._airtable.get_all(fields=[id_field])}
+        with self._lock:
+            deleted = [_ for _ in dict.keys(self) if _ not in ids]
+        for id_ in deleted:
+            self.pop(id_)
+
+        self._synced_at = synced_at
+        if base._store:
+            records = [_ for _ in dict.values(self) if _]
+            base._store.save(base._id, self._model._id, records)
+        return modified
 
     def __getitem__(self, key):
-        if not isinstance(key, str):
+        # Unsaved records have an empty id and nothing to fetch.
+        if not key or not isinstance(key, str):
             return dict.__getitem__(self, key)
         try:
-            return dict.__getitem__(self, key)
+            value = dict.__getitem__(self, key)
         except KeyError:
-            try:
-                self._model._base._hits += 1
-                value = self._airtable.get(key)
-            except HTTPError:
-                logging.warning("Record {} was not found.".format(key))
-                value = {}
-            self.__setitem__(key, value)
-        return dict.__getitem__(self, key)
+            return self._miss(key)
+        if self._expiry:
+            expires_at = self._expiry.get(key)
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._refetch_expired(key)
+                # Another thread might be refetching the record instead.
+                return self._miss(key)
+        self._metrics.hits += 1
+        if self._lru is not None:
+            self._lru.touch(self, key)
+        return value
+
+    def _miss(self, key):
+        """Return a record that is not cached, loading it from the snapshot or
+        fetching it. Threads missing the same record share a single request.
+
+        Args:
+            key (str): The id of the record.
+
+        Returns:
+            dict: The record data.
+        """
+        value = dict.get(self, key)
+        if value is not None:
+            return value
+        value = self._load_snapshot(key)
+        if value is not None:
+            self._metrics.hits += 1
+            return value
+        self._metrics.misses += 1
+        if key in self._pending:
+            self.resolve()
+        return self._single_flight(key, lambda: self._get(key))
+
+    def _get(self, key):
+        """Fetch a record and cache it, as an empty record if it does not exist.
+
+        Args:
+            key (str): The id of the record.
+
+        Returns:
+            dict: The record data.
+        """
+        value = self._load_shared([key]).get(key)
+        if value is not None:
+            return value
+        try:
+            self._metrics.gets += 1
+            value = self._airtable.get(key)
+            self._metrics.records += 1
+        except HTTPError:
+            logging.warning("Record {} was not found.".format(key))
+            value = {}
+        self[key] = value
+        if value:
+            self._share([value])
+        return value
+
+    def _load_shared(self, ids):
+        """Cache the records that other processes shared.
+
+        Args:
+            ids (list): The ids of the records.
+
+        Returns:
+            dict: The records loaded.
+        """
+        if self._shared is None or not ids:
+            return {}
+        base_id = self._model._base._id
+        # Records shared for longer than they stay fresh in this cache are stale.
+        records = self._shared.load_records(
+            base_id, self._model._id, list(ids), max_age=self._ttl
+        )
+        self._metrics.shared += len(records)
+        now = time.time()
+        loaded = {}
+        for id_, (record, shared_at) in records.items():
+            with self._lock:
+                self._set(id_, record, age=max(now - shared_at, 0.0))
+            self._track(id_, record)
+            loaded[id_] = record
+        return loaded
+
+    def _share(self, records):
+        """Share records that were fetched with other processes.
+
+        Args:
+            records (list): The records.
+        """
+        if self._shared is not None and records:
+            base_id = self._model._base._id
+            self._shared.save_records(base_id, self._model._id, records)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._set(key, value)
+        self._track(key, value)
+
+    def _set(self, key, value, age=0.0):
+        """Cache a record while holding the lock. Records fetched a while ago, for
+        instance by another process, expire that much earlier."""
+        dict.__setitem__(self, key, value)
+        self._projections.pop(key, None)
+        if self._snapshot is not None:
+            self._snapshot.discard(key)
+        for field_index in self._field_indexes.values():
+            field_index.add(key, value)
+        ttl = self._ttl if value else self._negative_ttl
+        if ttl is not None:
+            expires_at = time.monotonic() - age + ttl
+            self._expiry[key] = expires_at
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+            # Entries of records cached again or dropped since are left behind.
+            if len(self._expiry_heap) > 2 * len(self._expiry) + self._batch_size:
+                self._expiry_heap = [(_, id_) for id_, _ in self._expiry.items()]
+                heapq.heapify(self._expiry_heap)
+
+    def _track(self, key, value):
+        """Track the recency of a record that was just cached. This might evict
+        records of other caches, which is why the lock must not be held.
+        """
+        if self._lru is not None:
+            self._lru.add(self, key, value)
+
+    def __contains__(self, key):
+        if dict.__contains__(self, key):
+            return True
+        return self._snapshot is not None and key in self._snapshot
+
+    def __delitem__(self, key):
+        self._load_snapshot(key)
+        with self._lock:
+            dict.__delitem__(self, key)
+            self._forget(key)
+
+    def fresh(self, key):
+        """Whether a record is cached and has not expired.
+
+        Args:
+            key (str): The id of the record.
+
+        Returns:
+            bool: Whether the record is fresh.
+        """
+        if not dict.__contains__(self, key):
+            return self._snapshot is not None and key in self._snapshot
+        expires_at = self._expiry.get(key)
+        return expires_at is None or expires_at > time.monotonic()
 
     def get(self, key, default=None):
         try:
@@ -50,30 +295,720 @@ class Cache(dict):
         except KeyError:
             return default
 
-    def select(self, formula=""):
+    def pop(self, key, *args):
+        self._load_snapshot(key)
+        with self._lock:
+            value = dict.pop(self, key, *args)
+            self._forget(key)
+        return value
+
+    def _forget(self, key):
+        """Drop the bookkeeping of a record removed while holding the lock."""
+        self._projections.pop(key, None)
+        for field_index in self._field_indexes.values():
+            field_index.remove(key)
+        if self._lru is not None:
+            self._lru.discard(self, key)
+        self._expiry.pop(key, None)
+
+    def _evict(self, key):
+        """Drop a record to free memory. It will be fetched again when accessed."""
+        with self._lock:
+            if dict.pop(self, key, None) is None:
+                return
+            self._projections.pop(key, None)
+            for field_index in self._field_indexes.values():
+                field_index.remove(key)
+            self._expiry.pop(key, None)
+        self._metrics.evictions += 1
+
+    def _refetch_expired(self, key):
+        """Fetch again an expired record along with the records that expired first,
+        up to a single request worth of them. Other expired records are fetched
+        again when accessed.
+
+        Args:
+            key (str): The id of the expired record.
+        """
+        now = time.monotonic()
+        expired = [key]
+        with self._lock:
+            while (
+                self._expiry_heap
+                and self._expiry_heap[0][0] <= now
+                and len(expired) < self._batch_size
+            ):
+                expires_at, id_ = heapq.heappop(self._expiry_heap)
+                # Records cached again since have a later expiry in the heap.
+                if id_ != key and self._expiry.get(id_) == expires_at:
+                    expired.append(id_)
+        for id_ in expired:
+            self.pop(id_, None)
+        self._metrics.expirations += len(expired)
+        # The shared copies of expired records are as old as the ones that expired.
+        self.fetch_many(expired, shared=False)
+
+    def attach_snapshot(self, table):
+        """Serve records from a snapshot, replacing the cached ones. Records are
+        only decoded when first accessed.
+
+        Args:
+            table (airstorm.snapshots.SnapshotTable): The records of the table in
+                the snapshot.
+        """
+        with self._lock:
+            for key in [_ for _ in dict.keys(self) if _ in table]:
+                self.pop(key)
+            self._snapshot = table
+
+    def _load_snapshot(self, key=None):
+        """Decode a record of the snapshot, or all of them when no key is given,
+        for operations that need the records to actually be in the cache.
+
+        Args:
+            key (str, optional): The id of the record.
+
+        Returns:
+            dict: The record data, or None if the record is not in the snapshot.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        if key is None:
+            # Records are loaded one at a time, so that other threads always find
+            # them either in the snapshot or in the cache.
+            for id_ in snapshot.ids():
+                self._load_snapshot(id_)
+            self._snapshot = None
+            return None
+        with self._lock:
+            if key not in snapshot:
+                return None
+            value = snapshot.pop(key)
+            self._set(key, value)
+        self._track(key, value)
+        return value
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def holds(self, key, name):
+        """Whether a cached record holds a field, which is not the case of records
+        fetched with a projection that did not include it.
+
+        Args:
+            key (str): The id of the record.
+            name (str): The name of the field.
+
+        Returns:
+            bool: Whether the field is held.
+        """
+        projection = self._projections.get(key)
+        return projection is None or name in projection
+
+    def fetch_fields(self, ids, fields):
+        """Fetch the fields that cached records are missing because they were
+        fetched with a projection, in as few requests as possible.
+
+        Args:
+            ids (collections.abc.Iterable): The ids of the records.
+            fields (list): The fields or field names to fetch.
+
+        Returns:
+            dict: The records fetched.
+        """
+        names = _field_names(fields)
+        missing = {}
+        for id_ in dict.fromkeys(ids):
+            projection = self._projections.get(id_)
+            if projection is not None:
+                for name in names:
+                    if name not in projection:
+                        missing[id_] = None
+                        break
+        return self._fetch_ids(list(missing), fields=names)
+
+    def _store(self, record, names=None):
+        """Cache a record fetched with a projection, merging it with the fields
+        already held for it.
+
+        Args:
+            record (dict): The record data.
+            names (list, optional): The names of the fields fetched, all of them if
+                omitted.
+
+        Returns:
+            dict: The record data cached.
+        """
+        id_ = record["id"]
+        if names is None:
+            self[id_] = record
+            return record
+        self._load_snapshot(id_)
+        with self._lock:
+            previous = dict.get(self, id_)
+            projection = set(names)
+            if previous:
+                held = self._projections.get(id_)
+                # Airtable omits empty fields, which is why fetched ones are dropped.
+                fields = {
+                    key: value
+                    for key, value in previous.get("fields", {}).items()
+                    if key not in projection
+                }
+                fields.update(record.get("fields", {}))
+                record = dict(previous, fields=fields)
+                projection = None if held is None else held | projection
+            self._set(id_, record)
+            if projection is not None:
+                self._projections[id_] = projection
+                # Indexes cannot tell the value of fields that are not held.
+                for name, field_index in self._field_indexes.items():
+                    if name not in projection:
+                        field_index.remove(id_)
+        self._track(id_, record)
+        return record
+
+    def create_index(self, field, ordered=False):
+        """Index the values of a field across the cached records, to speed up model
+        lists filtering, grouping and sorting by this field. The index is kept up to
+        date as records get cached.
+
+        Args:
+            field (airstorm.fields.Field): The field to index.
+            ordered (bool, optional): Also sort records by value for range queries.
+
+        Returns:
+            airstorm.indexes.FieldIndex: The index.
+        """
+        self._load_snapshot()
+        field_index = self._field_indexes.get(field._name)
+        upgrade = ordered and not isinstance(field_index, SortedFieldIndex)
+        if field_index is None or upgrade:
+            field_index = SortedFieldIndex(field) if ordered else FieldIndex(field)
+            with self._lock:
+                for id_, record in dict.items(self):
+                    field_index.add(id_, record)
+                self._field_indexes[field._name] = field_index
+        return field_index
+
+    def field_index(self, field):
+        """Return the index of a field.
+
+        Args:
+            field (airstorm.fields.Field): The field.
+
+        Returns:
+            airstorm.indexes.FieldIndex: The index, or None if the field is not
+                indexed.
+        """
+        index = self._field_indexes.get(field._name)
+        return index if index and index._field is field else None
+
+    @property
+    def deferring(self):
+        """bool: Whether cache misses are currently being deferred."""
+        return bool(self._deferring)
+
+    @contextlib.contextmanager
+    def deferred(self):
+        """Context manager during which records can be deferred instead of being
+        fetched one by one. All deferred records are resolved in batch when leaving
+        the context or as soon as one of them is accessed.
+
+        Yields:
+            airstorm.cache.Cache: This cache.
+        """
+        with self._lock:
+            self._deferring += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._deferring -= 1
+                deferring = self._deferring
+            if not deferring:
+                self.resolve()
+
+    def defer(self, key):
+        """Schedule a record to be fetched with the next batch.
+
+        Args:
+            key (str): The id of the record.
+        """
+        if key not in self:
+            self._pending[key] = None
+
+    def resolve(self):
+        """Fetch all deferred records in batch.
+
+        Returns:
+            dict: The records fetched.
+        """
+        with self._lock:
+            ids = list(self._pending)
+            self._pending.clear()
+        return self.fetch_many(ids)
+
+    def fetch_many(self, ids, shared=True):
+        """Fetch the records that are not already cached in as few requests as
+        possible. Records that could not be found are cached as empty records.
+
+        Records that other threads are already fetching are waited for instead of
+        being fetched again.
+
+        Args:
+            ids (collections.abc.Iterable): The ids of the records to fetch.
+            shared (bool, optional): Load the records shared by other processes
+                instead of fetching them, when the base store shares records.
+
+        Returns:
+            dict: The records fetched.
+        """
+        missing = [_ for _ in dict.fromkeys(ids) if _ and _ not in self]
+        leading, following = self._join_flights(missing)
+        try:
+            fetched = self._load_shared(list(leading)) if shared else {}
+            fetched.update(self._fetch_ids([_ for _ in leading if _ not in fetched]))
+            for id_ in leading:
+                if id_ not in fetched:
+                    logging.warning("Record {} was not found.".format(id_))
+                    self[id_] = {}
+        except BaseException as error:
+            self._land_flights(leading, error=error)
+            raise
+        self._land_flights(leading, {_: fetched.get(_, {}) for _ in leading})
+        for id_, flight in following.items():
+            record = flight.wait()
+            if record:
+                fetched[id_] = record
+        return fetched
+
+    def _single_flight(self, key, fetch):
+        """Call a fetch, unless another thread is already running the same one in
+        which case its result is waited for and shared instead.
+
+        Args:
+            key (str, tuple): The id of the record fetched, or a tuple identifying
+                the fetch.
+            fetch (callable): The fetch.
+
+        Returns:
+            The result of the fetch.
+        """
+        leading, following = self._join_flights([key])
+        if key in following:
+            return following[key].wait()
+        if key not in leading:
+            # The record was cached in the meantime.
+            return self[key]
+        try:
+            result = fetch()
+        except BaseException as error:
+            self._land_flights(leading, error=error)
+            raise
+        self._land_flights(leading, {key: result})
+        return result
+
+    def _join_flights(self, keys):
+        """Start fetches for the keys nobody is fetching yet, and join the fetches
+        of other threads for the others. Records cached in the meantime are skipped.
+
+        Args:
+            keys (list): The ids of records, or tuples identifying fetches.
+
+        Returns:
+            tuple: The flights started by key, and the flights joined by key.
+        """
+        leading = {}
+        following = {}
+        with self._lock:
+            for key in keys:
+                flight = self._flights.get(key)
+                if flight is not None:
+                    following[key] = flight
+                elif not dict.__contains__(self, key):
+                    flight = self._flights[key] = _Flight()
+                    leading[key] = flight
+        return leading, following
+
+    def _land_flights(self, flights, results=None, error=None):
+        """Complete started fetches, waking up the threads waiting for them.
+
+        Args:
+            flights (dict): The flights by key.
+            results (dict, optional): The results by key.
+            error (BaseException, optional): The error the fetches failed with.
+        """
+        with self._lock:
+            for key in flights:
+                del self._flights[key]
+        for key, flight in flights.items():
+            flight.land(results.get(key) if results else None, error)
+
+    def _fetch_ids(self, ids, fields=None):
+        """Fetch records by id in chunks that each fit in a single request URL. The
+        chunks are fetched concurrently, within the rate limit of the base.
+
+        Args:
+            ids (list): The ids of the records.
+            fields (list, optional): The names of the fields to fetch.
+
+        Returns:
+            dict: The records fetched.
+        """
+        names = _field_names(fields) if fields else None
+        formulas = self.id_formulas(ids, names)
+        if len(formulas) < 2:
+            fetched = {}
+            for formula in formulas:
+                fetched.update(self._fetch(formula=formula, fields=names))
+            return fetched
+
+        kwargs = {"fields": names} if names else {}
+        workers = min(self._model._base._workers, len(formulas))
+        fetched = {}
+        shared = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._airtable.get_all, formula=_, **kwargs)
+                for _ in formulas
+            ]
+            for future in futures:
+                records = future.result()
+                self._metrics.lists += 1
+                self._metrics.records += len(records)
+                # The cache is only updated from this thread.
+                for record in records:
+                    fetched[record["id"]] = self._store(record, names)
+                if not names:
+                    shared += records
+        self._share(shared)
+        return fetched
+
+    def id_formulas(self, ids, fields=None):
+        """Split record ids into formulas matching them, each fitting in a single
+        request URL along with the fields to fetch.
+
+        Args:
+            ids (list): The ids of the records.
+            fields (list, optional): The names of the fields to fetch.
+
+        Returns:
+            list: The formulas.
+        """
+        length = len(self._airtable.url_table) + len("?filterByFormula=OR()")
+        for name in fields or []:
+            length += len("&fields%5B%5D=") + len(quote(name, safe=""))
+        return _id_formulas(ids, self._max_url_length - length, self._batch_size)
+
+    def select(self, formula="", fields=None):
         """Select multiple records in Airtable matching the provided formula.
 
+        When the table is indexed the formula is evaluated locally, unless it uses
+        constructs that are not supported in which case Airtable is queried.
+
         Args: formula (str, optional): A airtable formula to filter the search. Lean
             more about writing valid formulas at
             https://support.airtable.com/hc/en-us/articles/203255215-Formula-Field-Reference.
+            fields (list, optional): The fields or field names to download, all of
+                them if omitted. Fields that are not downloaded are fetched when
+                accessed. Indexed tables always hold all fields.
 
         Returns:
             dict: The data selected.
         """
-
-        # TODO: Needs to take indexing into account when a formula is passed.
-        # Currently will always hit Airtable.
-        if not formula and self._model._indexed:
-            return self
+        if self._model._indexed:
+            if not formula:
+                self._load_snapshot()
+                return self
+            try:
+                return self._select_locally(formula)
+            except UnsupportedFormula as error:
+                logging.info("Selecting on Airtable instead: {}".format(error))
 
         kwargs = {}
         if formula:
             kwargs["formula"] = formula
-        self._model._base._hits += 1
+        # Identical selects running at the same time share a single request.
+        key = ("select", formula, tuple(_field_names(fields or [])))
+        return self._single_flight(key, lambda: self._fetch(fields=fields, **kwargs))
+
+    def iter_select(self, formula="", page_size=100, cache=True, prefetch=True):
+        """Iterate over the records matching a formula page by page, so that only a
+        page of records needs to be held in memory at once.
+
+        Indexed tables are iterated from memory.
+
+        Args:
+            formula (str, optional): A airtable formula to filter the search.
+            page_size (int, optional): The amount of records per page, up to 100.
+            cache (bool, optional): Cache the records.
+            prefetch (bool, optional): Fetch the next page in the background while the
+                current page is being processed.
+
+        Yields:
+            list: The record data of each page.
+        """
+        if self._model._indexed:
+            records = list(self.select(formula=formula).values())
+            for page in chunked(records, page_size):
+                yield page
+            return
+
+        kwargs = {"page_size": page_size}
+        if formula:
+            kwargs["formula"] = formula
+        self._metrics.lists += 1
+        pages = self._airtable.get_iter(**kwargs)
+        if prefetch:
+            pages = _prefetched(pages)
+        for page in pages:
+            self._metrics.records += len(page)
+            if cache:
+                self.update((record["id"], record) for record in page)
+                self._share(page)
+            yield page
+
+    def push(self, records):
+        """Push the local changes of records to Airtable. Only changed fields are
+        sent, records without id are created, and the cache is updated from the
+        responses. Records without id nor changes are skipped, as they would be
+        created blank.
+
+        Args:
+            records (list): The records to push.
+        """
+        blanks = [_ for _ in records if not _._record_id and not _._changes]
+        if blanks:
+            logging.warning(
+                "Skipping {} records without id nor changes.".format(len(blanks))
+            )
+        creates = [_ for _ in records if not _._record_id and _._changes]
+        updates = [_ for _ in records if _._record_id and _._changes]
+        batches = [("create", _) for _ in chunked(creates, self._write_batch_size)]
+        batches += [("update", _) for _ in chunked(updates, self._write_batch_size)]
+        for batch, responses in self._write(batches):
+            for record, response in zip(batch, responses):
+                record._record_id = response["id"]
+                record._changes.clear()
+                self._model._dirty.pop(id(record), None)
+                self._model._instances.setdefault(response["id"], record)
+                self[response["id"]] = response
+            self._share(responses)
+
+    def delete(self, records):
+        """Delete records in Airtable. Deleted records are cached as empty records.
+
+        Args:
+            records (list): The records to delete.
+        """
+        ids = list(dict.fromkeys(_._record_id for _ in records if _._record_id))
+        batches = [("delete", _) for _ in chunked(ids, self._write_batch_size)]
+        for _, responses in self._write(batches):
+            for response in responses:
+                self[response["id"]] = {}
+            if self._shared is not None:
+                base_id = self._model._base._id
+                deleted = [_["id"] for _ in responses]
+                self._shared.delete_records(base_id, self._model._id, deleted)
+
+    def _write(self, batches):
+        """Send write batches on a bounded pool of workers.
+
+        Args:
+            batches (list): Tuples of operation, either "create", "update" or
+                "delete", and records or ids.
+
+        Yields:
+            tuple: Each batch and the records Airtable responded with.
+        """
+
+        def send(operation, batch):
+            if operation == "create":
+                return self._airtable.batch_insert([_._changes for _ in batch])
+            if operation == "update":
+                payload = [{"id": _._record_id, "fields": _._changes} for _ in batch]
+                return self._airtable.batch_update(payload)
+            return self._airtable.batch_delete(batch)
+
+        if not batches:
+            return
+        workers = min(self._model._base._workers, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(send, *_) for _ in batches]
+            for (_, batch), future in zip(batches, futures):
+                self._metrics.writes += 1
+                # The cache is only updated from this thread.
+                yield batch, future.result()
+
+    def _select_locally(self, formula):
+        """Select the cached records matching the formula.
+
+        Raises:
+            airstorm.formulas.UnsupportedFormula: The formula cannot be evaluated
+                locally.
+
+        Returns:
+            dict: The data selected.
+        """
+        self._load_snapshot()
+        function = self._formulas.get(formula)
+        if function is None:
+            function = compile_formula(formula, columns=self._model._schema["columns"])
+            self._formulas[formula] = function
+        with self._lock:
+            records = list(dict.items(self))
+        return {
+            id_: record
+            for id_, record in records
+            if record and is_true(function(record))
+        }
+
+    def _fetch(self, fields=None, **kwargs):
+        """Fetch the records matching the Airtable options and cache them.
+
+        Args:
+            fields (list, optional): The fields or field names to fetch, all of
+                them if omitted.
+
+        Returns:
+            dict: The records fetched.
+        """
+        names = _field_names(fields) if fields else None
+        if names:
+            kwargs["fields"] = names
+        self._metrics.lists += 1
         records = self._airtable.get_all(**kwargs)
+        self._metrics.records += len(records)
         cache = {}
         for record in records:
-            id_ = record["id"]
-            cache[id_] = record
-        self.update(cache)
+            cache[record["id"]] = self._store(record, names)
+        if not names:
+            self._share(records)
         return cache
+
+
+class _Flight:
+    """A fetch in progress that other threads can wait for."""
+
+    def __init__(self):
+        object.__init__(self)
+        self._landed = threading.Event()
+        self._result = None
+        self._error = None
+
+    def land(self, result=None, error=None):
+        """Complete the fetch.
+
+        Args:
+            result (optional): The result of the fetch.
+            error (BaseException, optional): The error the fetch failed with.
+        """
+        self._result = result
+        self._error = error
+        self._landed.set()
+
+    def wait(self):
+        """Wait for the fetch to complete.
+
+        Raises:
+            BaseException: The error the fetch failed with.
+
+        Returns:
+            The result of the fetch.
+        """
+        self._landed.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def _id_formulas(ids, max_length, max_ids):
+    """Split record ids into formulas matching them, each short enough to fit in a
+    request URL once encoded.
+
+    Args:
+        ids (list): The ids of the records.
+        max_length (int): The maximum length of encoded formulas.
+        max_ids (int): The maximum amount of ids per formula.
+
+    Returns:
+        list: The formulas.
+    """
+    formulas = []
+    clauses = []
+    length = 0
+    for id_ in ids:
+        clause = "RECORD_ID()='{}'".format(id_)
+        # Encoded clause and the encoded comma separating it from the previous one.
+        clause_length = len(quote(clause, safe="")) + 3
+        if clauses and (length + clause_length > max_length or len(clauses) >= max_ids):
+            formulas.append("OR({})".format(",".join(clauses)))
+            clauses = []
+            length = 0
+        clauses.append(clause)
+        length += clause_length
+    if clauses:
+        formulas.append("OR({})".format(",".join(clauses)))
+    return formulas
+
+
+def _field_names(fields):
+    """Return the names of fields.
+
+    Args:
+        fields (list): The fields or field names.
+
+    Returns:
+        list: The field names.
+    """
+    # pylint: disable=protected-access
+    return [_ if isinstance(_, str) else _._name for _ in fields]
+
+
+def _prefetched(iterator):
+    """Iterate in a background thread, one item ahead of the consumer.
+
+    Args:
+        iterator (collections.abc.Iterator): The iterator.
+
+    Yields:
+        The items of the iterator.
+    """
+    items = queue.Queue(maxsize=1)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        """Queue an item unless the consumer stopped, returning whether it did."""
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except Exception as error:  # pylint: disable=broad-except
+            put((done, error))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,56 @@
+import posixpath
+import time
+
+from airtable import Airtable
+
+
+class Client(Airtable):
+    """Airtable client sending its requests through the scheduler and transport of
+    its base, so that all the tables of a base share the Airtable rate limit and a
+    pool of connections. Each request is recorded in the metrics of the base.
+
+    Args:
+        base_id (str): The id of the base.
+        table_id (str): The id of the table.
+        transport (airstorm.transports.Transport): The transport of the base.
+        scheduler (airstorm.scheduler.Scheduler): The request scheduler of the base.
+        metrics (airstorm.metrics.Metrics): The metrics of the base.
+        api_url (str, optional): The URL of the Airtable API.
+    """
+
+    def __init__(
+        self, base_id: str, table_id: str, transport, scheduler, metrics, api_url=""
+    ):
+        # Not calling Airtable.__init__, which opens a session per table.
+        object.__init__(self)
+        if api_url:
+            self.API_URL = api_url.rstrip("/")
+        self.table_name = table_id
+        self.url_table = posixpath.join(self.API_URL, base_id, table_id)
+        self.timeout = None
+        self._transport = transport
+        self._scheduler = scheduler
+        self._metrics = metrics
+        self._table_metrics = metrics.table(table_id)
+        # Requests are already spaced by the scheduler, no need to sleep in between.
+        self.API_LIMIT = 0
+
+    def _request(self, method, url, params=None, json_data=None):
+        return self._scheduler.submit(
+            lambda: self._send(method, url, params=params, json_data=json_data),
+            method=method,
+        )
+
+    def _send(self, method, url, params=None, json_data=None):
+        start = time.perf_counter()
+        response = self._transport.request(
+            method, url, params=params, json_data=json_data
+        )
+        self._metrics.record_request(
+            self._table_metrics,
+            method,
+            response.status_code,
+            time.perf_counter() - start,
+            len(response.content),
+        )
+        return self._process_response(response)
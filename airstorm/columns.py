@@ -0,0 +1,130 @@
+import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_SELECT_FIELD_TYPES = ("select", "singleSelect")
+_MULTI_SELECT_FIELD_TYPES = ("multiSelect",)
+
+
+class DictionaryColumn:
+    """Column of select values encoded as integer codes pointing to categories.
+
+    Args:
+        codes (array.array, numpy.ndarray): The index of the category of each value.
+            Missing values are encoded as -1.
+        categories (list): The distinct values.
+        offsets (array.array, numpy.ndarray, optional): For multiple selects, the
+            position of the first code of each record in `codes`, followed by the
+            total amount of codes.
+    """
+
+    def __init__(self, codes, categories: list, offsets=None):
+        object.__init__(self)
+        self.codes = codes
+        self.categories = categories
+        self.offsets = offsets
+
+    def __len__(self):
+        if self.offsets is not None:
+            return len(self.offsets) - 1
+        return len(self.codes)
+
+    def decode(self):
+        """Return the values of the column.
+
+        Returns:
+            list: The values, lists of values for multiple selects.
+        """
+        values = [self.categories[_] if _ >= 0 else None for _ in self.codes]
+        if self.offsets is None:
+            return values
+        offsets = list(self.offsets)
+        return [values[start:end] for start, end in zip(offsets, offsets[1:])]
+
+
+def build_columns(records, fields):
+    """Build columns of field values straight from cached record data.
+
+    Numeric and checkbox fields become typed arrays, NumPy arrays when NumPy is
+    installed or `array.array` buffers otherwise. Selects and multiple selects are
+    dictionary encoded. Other fields become lists, or NumPy object arrays.
+
+    Args:
+        records (list): The record data as returned by Airtable.
+        fields (list): The fields of the columns to build.
+
+    Returns:
+        dict: The columns by field attribute name.
+    """
+    columns = {}
+    for field in fields:
+        # pylint: disable=protected-access
+        values = [field.value_from_data(record) for record in records]
+        type_ = field._schema["type"]
+        if type_ in _SELECT_FIELD_TYPES:
+            column = _dictionary_column(field, values, many=False)
+        elif type_ in _MULTI_SELECT_FIELD_TYPES:
+            column = _dictionary_column(field, values, many=True)
+        else:
+            column = _typed_column(field, values)
+        columns[field._attribute_name] = column
+    return columns
+
+
+def _typed_column(field, values):
+    # pylint: disable=protected-access
+    default = field._default_value
+    if isinstance(default, bool):
+        typecode, dtype = "b", "bool"
+    elif isinstance(default, int):
+        typecode, dtype = "q", "int64"
+    elif isinstance(default, float):
+        typecode, dtype = "d", "float64"
+    elif numpy is not None:
+        return numpy.array(values, dtype=object)
+    else:
+        return values
+    values = [default if _ is None else _ for _ in values]
+    if numpy is not None:
+        return numpy.array(values, dtype=dtype)
+    return array.array(typecode, values)
+
+
+def _dictionary_column(field, values, many):
+    # pylint: disable=protected-access
+    categories = []
+    options = field._schema.get("typeOptions") or {}
+    choices = options.get("choices") or {}
+    for choice_id in options.get("choiceOrder") or choices:
+        categories.append(choices[choice_id]["name"])
+    code_by_category = {category: code for code, category in enumerate(categories)}
+
+    def encode(value):
+        if value is None:
+            return -1
+        code = code_by_category.get(value)
+        if code is None:
+            # Values that are not part of the schema choices yet.
+            code = code_by_category[value] = len(categories)
+            categories.append(value)
+        return code
+
+    offsets = None
+    if many:
+        codes = []
+        offsets = [0]
+        for value in values:
+            codes.extend(encode(_) for _ in value or [])
+            offsets.append(len(codes))
+    else:
+        codes = [encode(value or None) for value in values]
+    if numpy is not None:
+        codes = numpy.array(codes, dtype="int32")
+        offsets = numpy.array(offsets, dtype="int64") if many else None
+    else:
+        codes = array.array("i", codes)
+        offsets = array.array("q", offsets) if many else None
+    return DictionaryColumn(codes, categories, offsets)
@@ -1,7 +1,5 @@
-import logging
-
 from collections.abc import Iterable
-from .fields import Field
+from .fields import EditableField
 
 
 class FieldList(object):
@@ -17,7 +15,7 @@ class FieldList(object):
 
     def __new__(cls, field):
         # pylint: disable=unused-argument
-        if isinstance(field, Field):
+        if isinstance(field, EditableField):
             return object.__new__(EditableFieldList)
         return object.__new__(cls)
 
@@ -30,6 +28,11 @@ class FieldList(object):
         if instance is None:
             return self
 
+        # Records fetched with a projection that did not include this field get it
+        # in batch.
+        cache = self._field._model._cache
+        cache.fetch_fields([_._record_id for _ in instance], [self._field])
+
         # If this field has a symmetric field we will make sure we get all necessary
         # records as one select.
         symmetric_field = self._field.symmetric_field()
@@ -40,12 +43,8 @@ class FieldList(object):
             for record in instance:
                 field = getattr(type(record), self._field._attribute_name)
                 ids.update(field.raw_value(record))
-            # Making sure we only select records that have not been already cached.
-            ids = [_ for _ in ids if _ not in symmetric_field._model._cache]
-            if ids:
-                formula = 'SEARCH(RECORD_ID(), "{}")'.format(",".join(ids))
-                logging.info("Performing pre-select.")
-                symmetric_field._model._cache.select(formula=formula)
+            # Only the records that are not already cached are fetched.
+            symmetric_field._model._cache.fetch_many(ids)
 
         values = []
         for record in instance:
@@ -66,20 +65,21 @@ class EditableFieldList(FieldList):
         Raises: ValueError: A value error is raised if the value passed is not the right
             length.
         """
-        if isinstance(value, Iterable):
+        attribute_name = self._field._attribute_name
+        if isinstance(value, Iterable) and not isinstance(value, str):
             value_len = len(value)
             records_len = len(instance)
-            if not value_len != records_len:
+            if value_len != records_len:
                 raise ValueError(
                     "Expected {} items but got {}.".format(records_len, value_len)
                 )
             for record, _value in zip(instance, value):
-                setattr(record, self._attribute_name, _value)
+                setattr(record, attribute_name, _value)
         else:
             for record in instance:
-                setattr(record, self._attribute_name, value)
+                setattr(record, attribute_name, value)
 
     def __delete__(self, instance):
         """Reset the local change for this field list."""
         for record in instance:
-            delattr(record, self._attribute_name)
+            delattr(record, self._field._attribute_name)
@@ -1,8 +1,3 @@
-import logging
-
-from .functions import to_snake_case
-
-
 class Field:
     """This property like object will map against a table field exposed as a snake_cased
     attribute on the model.
@@ -29,9 +24,8 @@ class Field:
         self._schema = schema
         self._id = schema["id"]
         self._name = schema["name"]
-        self._value = 5
         self._model = model
-        self._attribute_name = to_snake_case(self._name)
+        self._attribute_name = model._attribute_names[self._id]
 
         # Initialize many flag.
         options = self._schema["typeOptions"]
@@ -41,22 +35,41 @@ class Field:
         type_ = self._schema["type"]
         if type_ == "number":
             format_ = self._schema["typeOptions"]["format"]
-            self._default_value = 0 if format_ == "interger" else 0.0
+            self._default_value = 0 if format_ == "integer" else 0.0
         elif type_ in ("text", "singleSelect"):
             self._default_value = ""
             return
         elif type_ == "multiSelect":
             self._default_value = []
             return
+        elif type_ == "checkbox":
+            # Airtable omits unchecked checkboxes.
+            self._default_value = False
         else:
             self._default_value = None
 
     def raw_value(self, record):
-        return (
-            record._cache.get(record._record_id, {})
-            .get("fields", {})
-            .get(self._name, self._default_value)
-        )
+        # Local changes that have not been pushed yet take precedence.
+        if self._name in record._changes:
+            return record._changes[self._name]
+        if record._data is not None:
+            return self.value_from_data(record._data)
+        cache = record._cache
+        if not cache.holds(record._record_id, self._name):
+            # The record was fetched with a projection that did not include us.
+            cache.fetch_fields([record._record_id], [self._name])
+        return self.value_from_data(cache.get(record._record_id, {}))
+
+    def value_from_data(self, data: dict):
+        """Return the raw value of this field from record data.
+
+        Args:
+            data (dict): The record data as returned by Airtable.
+
+        Returns:
+            The raw value.
+        """
+        return data.get("fields", {}).get(self._name, self._default_value)
 
     def __get__(self, instance, owner):
         if instance is None:
@@ -73,12 +86,7 @@ class Field:
             # If we are going to end up selecting more than one record we should do this
             # as a single select first.
             if not model._indexed and len(value) > 1:
-                non_cached_ids = [_ for _ in value if _ not in model._cache]
-                if non_cached_ids:
-                    template = 'SEARCH(RECORD_ID(), "{}")'
-                    formula = template.format(",".join(non_cached_ids))
-                    logging.info("Performing pre-select on {}.".format(model))
-                    model._cache.select(formula=formula)
+                model._cache.fetch_many(value)
 
             for id_ in value:
                 records.append(model(id_))
@@ -115,8 +123,19 @@ class EditableField(Field):
         """Sets the value of the field.
         The value is "local" until the changes are pushed.
         """
-        self._value = value
+        if self._schema["type"] == "foreignKey":
+            # Linked records are stored as lists of record ids.
+            if value is None:
+                value = []
+            elif not isinstance(value, (list, tuple)):
+                value = [value]
+            value = [_ if isinstance(_, str) else _._record_id for _ in value]
+        instance._changes[self._name] = value
+        # Records with local changes are kept alive until pushed or reverted.
+        instance._dirty[id(instance)] = instance
 
     def __delete__(self, instance):
         """Reset the local change for this field."""
-        instance._value = None
+        instance._changes.pop(self._name, None)
+        if not instance._changes:
+            instance._dirty.pop(id(instance), None)
@@ -0,0 +1,408 @@
+import math
+import re
+
+# Field types whose raw values in the Airtable API match the values formulas see.
+# Linked records for instance are ids in the API but primary values in formulas.
+_SUPPORTED_FIELD_TYPES = (
+    "autoNumber",
+    "checkbox",
+    "count",
+    "currency",
+    "email",
+    "formula",
+    "multilineText",
+    "multiSelect",
+    "number",
+    "percent",
+    "phone",
+    "rating",
+    "richText",
+    "select",
+    "singleSelect",
+    "text",
+    "url",
+)
+
+_TOKEN_PATTERN = re.compile(
+    r"""\s*(?:
+        (?P<number>\d+\.?\d*|\.\d+)
+        |"(?P<double>(?:[^"\\]|\\.)*)"
+        |'(?P<single>(?:[^'\\]|\\.)*)'
+        |\{(?P<field>[^}]*)\}
+        |(?P<name>[A-Za-z_][A-Za-z0-9_]*)
+        |(?P<operator><=|>=|!=|<>|[=<>&+\-*/(),])
+    )""",
+    re.VERBOSE,
+)
+
+
+class UnsupportedFormula(Exception):
+    """Raised when a formula cannot be evaluated locally and should be sent to
+    Airtable instead."""
+
+
+def compile_formula(formula: str, columns=None):
+    """Compile an Airtable formula into a function evaluating it against a record.
+
+    Only a common subset of the formula language is supported: literals, field
+    references, comparisons, arithmetic, string concatenation and the logical, text
+    and numeric functions listed in `FUNCTIONS`.
+
+    Args:
+        formula (str): The formula to compile.
+        columns (list, optional): The schema of the columns of the table. When
+            provided, references to fields whose values differ between the API and
+            formulas are rejected.
+
+    Raises:
+        airstorm.formulas.UnsupportedFormula: The formula uses a construct that is
+            not supported. Evaluating the compiled formula can raise it as well.
+
+    Returns:
+        callable: A function taking a record dictionary and returning the value.
+    """
+    parser = _Parser(_tokenize(formula), columns)
+    return parser.parse()
+
+
+def is_true(value):
+    """Whether a formula value selects a record.
+
+    Args:
+        value: The value returned by the formula.
+
+    Returns:
+        bool: Whether the value is considered true by Airtable.
+    """
+    return value is not None and value != "" and value != 0 and value is not False
+
+
+def _tokenize(formula):
+    tokens = []
+    position = 0
+    formula = formula.rstrip()
+    while position < len(formula):
+        match = _TOKEN_PATTERN.match(formula, position)
+        if not match or match.end() == position:
+            raise UnsupportedFormula(
+                "Unexpected character at {} in {}.".format(position, formula)
+            )
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "number":
+            value = float(value) if "." in value else int(value)
+        elif kind in ("double", "single"):
+            kind = "string"
+            value = re.sub(r"\\(.)", r"\1", value)
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser turning formula tokens into nested functions."""
+
+    _comparisons = ("=", "!=", "<>", "<", ">", "<=", ">=")
+
+    def __init__(self, tokens, columns):
+        object.__init__(self)
+        self._tokens = tokens
+        self._position = 0
+        self._columns = None
+        if columns is not None:
+            self._columns = {column["name"]: column for column in columns}
+
+    def parse(self):
+        if not self._tokens:
+            raise UnsupportedFormula("Empty formula.")
+        expression = self._comparison()
+        if self._peek() is not None:
+            raise UnsupportedFormula("Unexpected token {}.".format(self._peek()))
+        return expression
+
+    def _peek(self):
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            raise UnsupportedFormula("Unexpected end of formula.")
+        self._position += 1
+        return token
+
+    def _accept(self, *operators):
+        token = self._peek()
+        if token and token[0] == "operator" and token[1] in operators:
+            self._position += 1
+            return token[1]
+        return None
+
+    def _expect(self, operator):
+        if not self._accept(operator):
+            raise UnsupportedFormula("Expected {}.".format(operator))
+
+    def _binary(self, operand, operators, apply):
+        left = operand()
+        operator = self._accept(*operators)
+        while operator:
+            right = operand()
+            left = _bind(apply, operator, left, right)
+            operator = self._accept(*operators)
+        return left
+
+    def _comparison(self):
+        return self._binary(self._concatenation, self._comparisons, _compare)
+
+    def _concatenation(self):
+        return self._binary(self._additive, ("&",), _operate)
+
+    def _additive(self):
+        return self._binary(self._multiplicative, ("+", "-"), _operate)
+
+    def _multiplicative(self):
+        return self._binary(self._unary, ("*", "/"), _operate)
+
+    def _unary(self):
+        if self._accept("-"):
+            operand = self._unary()
+            return lambda record: -_to_number(operand(record))
+        return self._primary()
+
+    def _primary(self):
+        kind, value = self._next()
+        if kind in ("number", "string"):
+            return lambda record: value
+        if kind == "field":
+            return self._field(value)
+        if kind == "name":
+            if self._accept("("):
+                return self._function(value.upper())
+            if value.upper() in ("TRUE", "FALSE"):
+                return _constant(value.upper() == "TRUE")
+            return self._field(value)
+        if kind == "operator" and value == "(":
+            expression = self._comparison()
+            self._expect(")")
+            return expression
+        raise UnsupportedFormula("Unexpected token {}.".format(value))
+
+    def _field(self, name):
+        if self._columns is not None:
+            column = self._columns.get(name)
+            if column is None:
+                raise UnsupportedFormula("Unknown field {}.".format(name))
+            type_ = column["type"]
+            options = column.get("typeOptions") or {}
+            if type_ not in _SUPPORTED_FIELD_TYPES or (
+                type_ == "formula" and options.get("resultType") == "date"
+            ):
+                raise UnsupportedFormula("Unsupported {} field {}.".format(type_, name))
+
+        def field(record):
+            value = record.get("fields", {}).get(name)
+            if isinstance(value, list):
+                # Multiple selects are seen as comma separated strings.
+                if not all(isinstance(_, str) for _ in value):
+                    raise UnsupportedFormula("Unsupported value for {}.".format(name))
+                return ", ".join(value)
+            if isinstance(value, dict):
+                raise UnsupportedFormula("Unsupported value for {}.".format(name))
+            return value
+
+        return field
+
+    def _function(self, name):
+        arguments = []
+        if not self._accept(")"):
+            arguments.append(self._comparison())
+            while self._accept(","):
+                arguments.append(self._comparison())
+            self._expect(")")
+        if name == "RECORD_ID" and not arguments:
+            return lambda record: record.get("id")
+        if name in ("AND", "OR", "IF"):
+            # These are evaluated lazily.
+            return _LAZY_FUNCTIONS[name](arguments)
+        function = FUNCTIONS.get(name)
+        if function is None:
+            raise UnsupportedFormula("Unsupported function {}.".format(name))
+
+        def call(record):
+            values = [_(record) for _ in arguments]
+            try:
+                return function(*values)
+            except (TypeError, ValueError, ZeroDivisionError) as error:
+                raise UnsupportedFormula("{} failed: {}".format(name, error))
+
+        return call
+
+
+def _bind(apply, operator, left, right):
+    return lambda record: apply(operator, left(record), right(record))
+
+
+def _constant(value):
+    return lambda record: value
+
+
+def _to_number(value):
+    if value is None:
+        return 0
+    if isinstance(value, (bool, int, float)):
+        return value
+    raise UnsupportedFormula("Cannot use {!r} as a number.".format(value))
+
+
+def _to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _compare(operator, left, right):
+    if left is None and right is None:
+        left, right = 0, 0
+    elif left is None:
+        left = "" if isinstance(right, str) else 0
+    elif right is None:
+        right = "" if isinstance(left, str) else 0
+    if isinstance(left, str) != isinstance(right, str):
+        raise UnsupportedFormula("Cannot compare {!r} and {!r}.".format(left, right))
+    if operator == "=":
+        return left == right
+    if operator in ("!=", "<>"):
+        return left != right
+    if operator == "<":
+        return left < right
+    if operator == ">":
+        return left > right
+    if operator == "<=":
+        return left <= right
+    return left >= right
+
+
+def _operate(operator, left, right):
+    if operator == "&":
+        return _to_text(left) + _to_text(right)
+    left = _to_number(left)
+    right = _to_number(right)
+    if operator == "+":
+        return left + right
+    if operator == "-":
+        return left - right
+    if operator == "*":
+        return left * right
+    if not right:
+        raise UnsupportedFormula("Division by zero.")
+    return left / right
+
+
+def _and(arguments):
+    return lambda record: all(is_true(_(record)) for _ in arguments)
+
+
+def _or(arguments):
+    return lambda record: any(is_true(_(record)) for _ in arguments)
+
+
+def _if(arguments):
+    if len(arguments) not in (2, 3):
+        raise UnsupportedFormula("IF expects 2 or 3 arguments.")
+    condition = arguments[0]
+    true = arguments[1]
+    false = arguments[2] if len(arguments) == 3 else _constant(None)
+    return lambda record: true(record) if is_true(condition(record)) else false(record)
+
+
+_LAZY_FUNCTIONS = {"AND": _and, "OR": _or, "IF": _if}
+
+
+def _find(needle, haystack, start=0):
+    start = max(int(_to_number(start)) - 1, 0)
+    return _to_text(haystack).find(_to_text(needle), start) + 1
+
+
+def _search(needle, haystack, start=0):
+    return _find(needle, haystack, start) or None
+
+
+def _round_half_away(value):
+    return math.copysign(math.floor(abs(value) + 0.5), value)
+
+
+def _round(value, precision=0, rounding=_round_half_away):
+    factor = 10 ** int(_to_number(precision))
+    return rounding(_to_number(value) * factor) / factor
+
+
+def _substitute(text, old, new, index=None):
+    if index is not None:
+        raise UnsupportedFormula("SUBSTITUTE index is not supported.")
+    return _to_text(text).replace(_to_text(old), _to_text(new))
+
+
+def _left(text, count):
+    return _to_text(text)[: int(_to_number(count))]
+
+
+def _right(text, count):
+    text = _to_text(text)
+    start = max(len(text) - int(_to_number(count)), 0)
+    return text[start:]
+
+
+def _mid(text, start, count):
+    start = max(int(_to_number(start)) - 1, 0)
+    return _to_text(text)[start:][: int(_to_number(count))]
+
+
+def _value(text):
+    text = _to_text(text).strip().replace(",", "")
+    try:
+        return float(text) if "." in text else int(text)
+    except ValueError:
+        raise UnsupportedFormula("Cannot convert {!r} to a number.".format(text))
+
+
+def _numbers(values):
+    return [_to_number(_) for _ in values]
+
+
+FUNCTIONS = {
+    "ABS": lambda value: abs(_to_number(value)),
+    "AVERAGE": lambda *values: sum(_numbers(values)) / len(values),
+    "BLANK": lambda: None,
+    "CEILING": lambda value: math.ceil(_to_number(value)),
+    "CONCATENATE": lambda *values: "".join(_to_text(_) for _ in values),
+    "FALSE": lambda: False,
+    "FIND": _find,
+    "FLOOR": lambda value: math.floor(_to_number(value)),
+    "INT": lambda value: math.floor(_to_number(value)),
+    "LEFT": _left,
+    "LEN": lambda text: len(_to_text(text)),
+    "LOWER": lambda text: _to_text(text).lower(),
+    "MAX": lambda *values: max(_numbers(values)),
+    "MID": _mid,
+    "MIN": lambda *values: min(_numbers(values)),
+    "MOD": lambda value, divisor: _to_number(value) % _to_number(divisor),
+    "NOT": lambda value: not is_true(value),
+    "REPT": lambda text, count: _to_text(text) * int(_to_number(count)),
+    "RIGHT": _right,
+    "ROUND": _round,
+    "ROUNDDOWN": lambda value, precision=0: _round(value, precision, math.trunc),
+    "SEARCH": _search,
+    "SUBSTITUTE": _substitute,
+    "SUM": lambda *values: sum(_numbers(values)),
+    "T": lambda value: value if isinstance(value, str) else "",
+    "TRIM": lambda text: _to_text(text).strip(),
+    "TRUE": lambda: True,
+    "UPPER": lambda text: _to_text(text).upper(),
+    "VALUE": _value,
+    "XOR": lambda *values: sum(is_true(_) for _ in values) % 2 == 1,
+}
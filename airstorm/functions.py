@@ -1,6 +1,10 @@
+import functools
+import itertools
+
 import inflection
 
 
+@functools.lru_cache(maxsize=None)
 def to_singular_pascal_case(name: str):
     """Make any string into a singular "PascalCased" string.
 
@@ -17,6 +21,7 @@ def to_singular_pascal_case(name: str):
     )
 
 
+@functools.lru_cache(maxsize=None)
 def to_snake_case(name: str):
     """Make any string into a "snake_cased" string.
 
@@ -27,3 +32,33 @@ def to_snake_case(name: str):
         str: The converted string.
     """
     return inflection.parameterize(inflection.titleize(name), separator="_").lower()
+
+
+@functools.lru_cache(maxsize=None)
+def to_plural(name: str):
+    """Make any word plural.
+
+    Args:
+        name (str): The word to convert.
+
+    Returns:
+        str: The converted word.
+    """
+    return inflection.pluralize(name)
+
+
+def chunked(iterable, size: int):
+    """Split an iterable into lists of a maximum size.
+
+    Args:
+        iterable (collections.abc.Iterable): The items to split.
+        size (int): The maximum size of each chunk.
+
+    Yields:
+        list: The chunks.
+    """
+    iterator = iter(iterable)
+    chunk = list(itertools.islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, size))
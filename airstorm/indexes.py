@@ -0,0 +1,161 @@
+import bisect
+
+
+class FieldIndex:
+    """Hash index of the values a field takes across the records of a cache. It is
+    kept up to date by the cache as records are cached.
+
+    Args:
+        field (airstorm.fields.Field): The indexed field.
+    """
+
+    def __init__(self, field):
+        object.__init__(self)
+        if field._schema["type"] == "foreignKey":
+            raise ValueError("Cannot index linked record field {}.".format(field))
+        self._field = field
+        self._value_by_id = {}
+        self._ids_by_key = {}
+
+    def __len__(self):
+        return len(self._value_by_id)
+
+    def add(self, id_: str, record: dict):
+        """Index the value of a record, replacing any previously indexed value.
+
+        Args:
+            id_ (str): The id of the record.
+            record (dict): The record data.
+        """
+        self.remove(id_)
+        if not record:
+            return
+        value = self._field.value_from_data(record)
+        self._value_by_id[id_] = value
+        for key in _keys(value):
+            try:
+                self._ids_by_key.setdefault(key, {})[id_] = None
+            except TypeError:
+                # Unhashable values such as attachments can only be scanned.
+                continue
+
+    def remove(self, id_: str):
+        """Stop indexing a record.
+
+        Args:
+            id_ (str): The id of the record.
+        """
+        if id_ not in self._value_by_id:
+            return
+        value = self._value_by_id.pop(id_)
+        for key in _keys(value):
+            try:
+                ids = self._ids_by_key[key]
+            except (KeyError, TypeError):
+                continue
+            ids.pop(id_, None)
+            if not ids:
+                del self._ids_by_key[key]
+
+    def covers(self, id_: str):
+        """Whether a record is indexed.
+
+        Args:
+            id_ (str): The id of the record.
+
+        Returns:
+            bool: Whether the record is indexed.
+        """
+        return id_ in self._value_by_id
+
+    def value(self, id_: str):
+        """Return the value of the field for an indexed record.
+
+        Args:
+            id_ (str): The id of the record.
+
+        Returns:
+            The value of the field.
+        """
+        return self._value_by_id[id_]
+
+    def keys(self, id_: str):
+        """Return the keys a record is grouped under, which are the items of list
+        values or the value itself otherwise.
+
+        Args:
+            id_ (str): The id of the record.
+
+        Returns:
+            list: The keys.
+        """
+        return _keys(self._value_by_id[id_])
+
+    def lookup(self, value):
+        """Return the ids of the records whose field is equal to a value.
+
+        Args:
+            value: The value to look for. Must be hashable.
+
+        Returns:
+            set: The ids of the matching records.
+        """
+        keys = _keys(value)
+        if len(keys) != 1:
+            # List values are not worth indexing, we just scan the records.
+            return {id_ for id_, _ in self._value_by_id.items() if _ == value}
+        candidates = self._ids_by_key.get(keys[0], {})
+        # Records with list values are keyed under each item, hence the check.
+        return {id_ for id_ in candidates if self._value_by_id[id_] == value}
+
+
+class SortedFieldIndex(FieldIndex):
+    """Field index that additionally keeps records sorted by value for range
+    queries. Sorting is done lazily when a range is first queried after changes.
+
+    Args:
+        field (airstorm.fields.Field): The indexed field.
+    """
+
+    def __init__(self, field):
+        FieldIndex.__init__(self, field)
+        self._sorted_values = None
+        self._sorted_ids = None
+
+    def add(self, id_, record):
+        FieldIndex.add(self, id_, record)
+        self._sorted_values = None
+
+    def remove(self, id_):
+        FieldIndex.remove(self, id_)
+        self._sorted_values = None
+
+    def range(self, low=None, high=None):
+        """Return the ids of the records whose value is within a range, sorted by
+        value. Records without value are excluded.
+
+        Args:
+            low (optional): The inclusive lower bound. Unbounded by default.
+            high (optional): The inclusive upper bound. Unbounded by default.
+
+        Returns:
+            list: The ids of the matching records.
+        """
+        if self._sorted_values is None:
+            pairs = sorted(
+                (value, id_)
+                for id_, value in self._value_by_id.items()
+                if value is not None
+            )
+            self._sorted_values = [value for value, _ in pairs]
+            self._sorted_ids = [id_ for _, id_ in pairs]
+        values = self._sorted_values
+        start = 0 if low is None else bisect.bisect_left(values, low)
+        end = len(values) if high is None else bisect.bisect_right(values, high)
+        return self._sorted_ids[start:end]
+
+
+def _keys(value):
+    if isinstance(value, list):
+        return value
+    return [value]
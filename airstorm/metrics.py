@@ -0,0 +1,178 @@
+import bisect
+import logging
+
+# Upper bounds in seconds of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Histogram counting observations in fixed buckets.
+
+    Args:
+        bounds (tuple, optional): The sorted upper bounds of the buckets. A last
+            bucket counts the observations above the last bound.
+    """
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        object.__init__(self)
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Count an observation.
+
+        Args:
+            value (float): The observed value.
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self):
+        """Return the histogram as a dictionary.
+
+        Returns:
+            dict: The bucket counts by upper bound, the count and sum of
+                observations.
+        """
+        bounds = [str(_) for _ in self.bounds] + ["inf"]
+        return {
+            "buckets": dict(zip(bounds, self.counts)),
+            "count": self.count,
+            "sum": self.sum,
+        }
+
+
+class TableMetrics:
+    """Counters of the activity of the cache of a table. Attributes are plain
+    integers so that the cache can update them at no noticeable cost.
+
+    Args:
+        table_id (str): The id of the table.
+        name (str, optional): The name of the table.
+    """
+
+    def __init__(self, table_id: str, name=""):
+        object.__init__(self)
+        self.table_id = table_id
+        self.name = name
+        # Records accessed from the cache, and the ones that had to be fetched.
+        self.hits = 0
+        self.misses = 0
+        # Missed records loaded from a store shared with other processes instead.
+        self.shared = 0
+        # Records dropped from the cache to stay within its memory budget, and
+        # records fetched again because they expired.
+        self.evictions = 0
+        self.expirations = 0
+        # Single record gets and multiple records lists asked to Airtable.
+        self.gets = 0
+        self.lists = 0
+        # Batches of records created, updated or deleted in Airtable.
+        self.writes = 0
+        # HTTP requests sent, including list pages, and what they transferred.
+        self.requests = 0
+        self.records = 0
+        self.bytes = 0
+        self.latency = Histogram()
+
+    def as_dict(self):
+        """Return the metrics as a dictionary.
+
+        Returns:
+            dict: The counters and latency histogram.
+        """
+        metrics = dict(vars(self))
+        metrics["latency"] = self.latency.as_dict()
+        return metrics
+
+
+class Metrics:
+    """Collect performance metrics of the tables of a base and forward requests to
+    subscribed callbacks, for instance to push them to a monitoring system.
+    """
+
+    def __init__(self):
+        object.__init__(self)
+        self._tables = {}
+        self._callbacks = []
+
+    def table(self, table_id: str, name=""):
+        """Return the metrics of a table.
+
+        Args:
+            table_id (str): The id of the table.
+            name (str, optional): The name of the table.
+
+        Returns:
+            airstorm.metrics.TableMetrics: The metrics of the table.
+        """
+        table = self._tables.get(table_id)
+        if table is None:
+            table = self._tables.setdefault(table_id, TableMetrics(table_id, name))
+        return table
+
+    def subscribe(self, callback):
+        """Call a function for each request made to Airtable.
+
+        Args:
+            callback (callable): A function taking a dictionary describing the
+                request: `table_id`, `table`, `method`, `status_code`, `latency` in
+                seconds and `bytes`.
+        """
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        """Stop calling a subscribed function.
+
+        Args:
+            callback (callable): The function.
+        """
+        self._callbacks.remove(callback)
+
+    def record_request(self, table, method, status_code, latency, size):
+        """Record a request made to Airtable.
+
+        Args:
+            table (airstorm.metrics.TableMetrics): The metrics of the table.
+            method (str): The HTTP method.
+            status_code (int): The status code of the response.
+            latency (float): The time the request took in seconds.
+            size (int): The size of the response in bytes.
+        """
+        table.requests += 1
+        table.bytes += size
+        table.latency.observe(latency)
+        if not self._callbacks:
+            return
+        event = {
+            "table_id": table.table_id,
+            "table": table.name,
+            "method": method,
+            "status_code": status_code,
+            "latency": latency,
+            "bytes": size,
+        }
+        for callback in list(self._callbacks):
+            try:
+                callback(event)
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Metrics callback {} failed.".format(callback))
+
+    @property
+    def operations(self):
+        """int: The total amount of gets and lists asked to Airtable."""
+        return sum(_.gets + _.lists for _ in list(self._tables.values()))
+
+    def snapshot(self):
+        """Return the metrics of all the tables.
+
+        Returns:
+            dict: The metrics of each table by table name, or id if unnamed.
+        """
+        return {
+            table.name or table.table_id: table.as_dict()
+            for table in list(self._tables.values())
+        }
@@ -1,8 +1,8 @@
 import logging
+import weakref
 
 from .fields import Field
 from .cache import Cache
-from .functions import to_snake_case
 
 
 class Model(type):
@@ -13,7 +13,16 @@ class Model(type):
         # pylint: disable=protected-access
 
         def __init__(self, record_id=""):  # noqa: N807
-            record = self._cache.get(record_id)
+            # Local field changes by field name, until they are pushed.
+            self._changes = {}
+            # Record data held by records that are not cached.
+            self._data = None
+            if record_id and self._cache.deferring:
+                # The record will be fetched along with the other deferred ones.
+                self._cache.defer(record_id)
+                self._record_id = record_id
+                return
+            record = self._cache.get(record_id) if record_id else None
             self._record_id = record_id if record else ""
 
         def __repr__(self):  # noqa: N807
@@ -24,7 +33,7 @@ class Model(type):
             )
 
         def __str__(self):  # noqa: N807
-            return str(getattr(self, to_snake_case(self._primary_field)))
+            return str(getattr(self, self._primary_attribute_name))
 
         def __bool__(self):  # noqa: N807
             """Will return whether or not the record exists in Airtable.
@@ -32,7 +41,9 @@ class Model(type):
             Returns:
                 bool: Whether the record exists.
             """
-            return bool(self._record_id)
+            if self._data is not None:
+                return bool(self._record_id and self._data)
+            return bool(self._record_id and self._cache.get(self._record_id))
 
         def __hash__(self):  # noqa: N807
             return hash(self._record_id) or id(self)
@@ -43,16 +54,18 @@ class Model(type):
             return False
 
         def delete(self):  # noqa: N807
-            """TODO: Delete record in Airtable."""
-            logging.warning("delete implemented yet.")
+            """Delete record in Airtable."""
+            self._cache.delete([self])
 
         def push(self):
-            """ TODO: Push record changes to Airtable."""
-            logging.warning("push implemented yet.")
+            """Push record changes to Airtable. Creates the record if it does not
+            exist yet."""
+            self._cache.push([self])
 
         def revert(self):
-            """ TODO: Revert record local change."""
-            logging.warning("revert implemented yet.")
+            """Revert record local changes."""
+            self._changes.clear()
+            self._dirty.pop(id(self), None)
 
         methods = {
             "__init__": __init__,
@@ -72,6 +85,13 @@ class Model(type):
             "_name": dict_["_schema"]["name"],
             "_primary_field": dict_["_schema"]["primaryColumnName"],
             "_field_by_id": {},
+            # Records by id, so that the same id always gives the same record.
+            "_instances": weakref.WeakValueDictionary(),
+            # Records with local changes by object id, which must not be collected
+            # before the changes are pushed or reverted.
+            "_dirty": {},
+            # Records are numerous, they do not need a dictionary of attributes.
+            "__slots__": ("_record_id", "_changes", "_data", "__weakref__"),
             "__doc__": dict_["_schema"].get(
                 "description", "{} model.".format(dict_["_schema"]["name"])
             ),
@@ -88,8 +108,8 @@ class Model(type):
 
         # Creating field (column) attributes.
         for field_schema in class_._schema["columns"]:
-            # Snake casing the field name for the attribute name..
-            attribute_name = to_snake_case(field_schema["name"])
+            # The snake cased field name, compiled with the schema.
+            attribute_name = class_._attribute_names[field_schema["id"]]
             # Informing of any field name conflicts. Technically Airtable allows to have
             # multiple column with the same name, but our API cannot support it for
             # obvious reason. As the result first arrived, first served.
@@ -103,15 +123,85 @@ class Model(type):
 
         return class_
 
-    def find(cls, formula=""):
+    def __call__(cls, record_id=""):
+        # pylint: disable=protected-access
+        if record_id:
+            instance = cls._instances.get(record_id)
+            if instance is not None:
+                return instance
+        instance = super(Model, cls).__call__(record_id)
+        if instance._record_id:
+            instance = cls._instances.setdefault(instance._record_id, instance)
+        return instance
+
+    def find(cls, formula="", fields=None):
         """Return first found record by field value.
 
         Args: formula (str, optional): A airtable formula to filter the search. Lean
             more about writing valid formulas at
             https://support.airtable.com/hc/en-us/articles/203255215-Formula-Field-Reference.
+            fields (list, optional): The fields or field names to download, all of
+                them if omitted. Other fields are fetched when first accessed.
 
         Returns:
             airstorm.model.Model: The found record.
         """
-        records = cls._base._model_list_by_id[cls._schema["id"]].find(formula=formula)
+        records = cls._base._model_list_by_id[cls._schema["id"]].find(
+            formula=formula, fields=fields
+        )
         return records[0] if records else cls()
+
+    def detached(cls, record: dict):
+        """Return a record holding its own data instead of reading it from the cache,
+        which allows iterating over many records without caching them.
+
+        Args:
+            record (dict): The record data as returned by Airtable.
+
+        Returns:
+            airstorm.model.Model: The record.
+        """
+        # pylint: disable=protected-access
+        instance = cls.__new__(cls)
+        instance._changes = {}
+        instance._data = record
+        instance._record_id = record.get("id", "")
+        return instance
+
+    def deferred(cls):
+        """Return a context manager during which initialized records are not fetched
+        one by one but gathered and fetched in batch when leaving the context, or as
+        soon as one of them is accessed.
+
+        Example:
+            >>> with base.Fruit.deferred():
+            ...     fruits = [base.Fruit(id_) for id_ in ids]
+
+        Returns:
+            contextlib.AbstractContextManager: The deferring context.
+        """
+        return cls._cache.deferred()
+
+    def refresh(cls):
+        """Update the cache of an indexed model with the records modified in
+        Airtable since it was last downloaded or refreshed, and drop deleted ones.
+
+        Returns:
+            dict: The records modified.
+        """
+        return cls._cache.refresh()
+
+    def create_index(cls, field, ordered=False):
+        """Index the values of a field across cached records. Model lists use the
+        index to filter, split, group and sort by this field without reading the
+        field of each record.
+
+        Args:
+            field (airstorm.fields.Field): The field of this model to index.
+            ordered (bool, optional): Also sort records by value, which model lists
+                use for range queries.
+
+        Returns:
+            airstorm.indexes.FieldIndex: The index.
+        """
+        return cls._cache.create_index(field, ordered=ordered)
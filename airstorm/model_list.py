@@ -1,8 +1,7 @@
-import logging
-import inflection
-
+from .columns import build_columns
 from .fields import Field
 from .field_lists import FieldList
+from .indexes import SortedFieldIndex
 
 
 class ModelList(type):
@@ -21,25 +20,27 @@ class ModelList(type):
             list.__init__(self, records)
 
         def delete(self):  # noqa: N807
-            """TODO: Delete records in Airtable."""
-            # pylint: disable=unused-argument
-            logging.warning("delete implemented yet.")
+            """Delete records in Airtable, 10 records per request."""
+            self._model._cache.delete(self)
 
         def push(self):
-            """ TODO: Push records changes to Airtable."""
-            # pylint: disable=unused-argument
-            logging.warning("push implemented yet.")
+            """Push records changes to Airtable, 10 records per request. Only the
+            changed fields are sent and records that do not exist yet are created.
+            """
+            self._model._cache.push(self)
 
         def revert(self):
-            """TODO: Revert records local changes."""
-            # pylint: disable=unused-argument
-            logging.warning("revert implemented yet.")
+            """Revert records local changes."""
+            for record in self:
+                record._changes.clear()
+                record._dirty.pop(id(record), None)
 
         def grouped(self, field: Field):
             """Return records grouped by a field value."""
             grouped = {}
+            get = _field_getter(self._model, field)
             for record in self:
-                values = getattr(record, field._attribute_name)
+                values = get(record)
                 if not isinstance(values, list):
                     values = [values]
                 for value in values:
@@ -57,17 +58,38 @@ class ModelList(type):
                 airstorm.model_list.ModelList: The filtered model list.
             """
             filtered = type(self)()
+            match = _field_matcher(self._model, field, value)
             for record in self:
-                if getattr(record, field._attribute_name) == value:
+                if match(record):
                     filtered.append(record)
             return filtered
 
+        def ranged(self, field: Field, low=None, high=None):
+            """Returns records which field value is within a range. Records without
+            value are excluded.
+
+            Args:
+                field (Field): The field to filter by.
+                low (optional): The inclusive lower bound. Unbounded by default.
+                high (optional): The inclusive upper bound. Unbounded by default.
+
+            Returns:
+                airstorm.model_list.ModelList: The filtered model list.
+            """
+            ranged = type(self)()
+            match = _range_matcher(self._model, field, low, high)
+            for record in self:
+                if match(record):
+                    ranged.append(record)
+            return ranged
+
         def split(self, field: Field, value):
             """Returns two sets separtated by their matching state of a field value."""
             true = type(self)()
             false = type(self)()
+            match = _field_matcher(self._model, field, value)
             for record in self:
-                if getattr(record, field._attribute_name) == value:
+                if match(record):
                     true.append(record)
                 else:
                     false.append(record)
@@ -79,11 +101,60 @@ class ModelList(type):
             # pylint: disable=unexpected-keyword-arg
             sorted_ = sorted(
                 self,
-                key=lambda record: getattr(record, field._attribute_name),
+                key=_field_getter(self._model, field),
                 reverse=reverse,
             )
             return type(self)(*sorted_)
 
+        def columns(self, fields):
+            """Return field values of all records as columns, built straight from the
+            cached record data. This is much faster than field lists for analytics.
+
+            Numeric and checkbox fields become NumPy arrays when NumPy is installed,
+            or `array.array` buffers otherwise. Selects and multiple selects become
+            dictionary encoded `airstorm.columns.DictionaryColumn` objects.
+
+            Args:
+                fields (list): The fields or field attribute names.
+
+            Returns:
+                dict: The columns by field attribute name.
+            """
+            fields = [
+                getattr(self._model, _) if isinstance(_, str) else _ for _ in fields
+            ]
+            for field in fields:
+                if not isinstance(field, Field):
+                    raise ValueError("{} is not a field of {}.".format(field, self))
+            cache = self._model._cache
+            cache.fetch_fields([_._record_id for _ in self], fields)
+            records = [
+                cache.get(_._record_id, {}) if _._data is None else _._data
+                for _ in self
+            ]
+            return build_columns(records, fields)
+
+        def prefetch(self, *paths):
+            """Fetch the records linked to these records along paths of linked
+            fields, so that traversing them afterwards does not fetch records one by
+            one. Each hop costs one batch of requests whatever the amount of records.
+
+            Example:
+                >>> smoothies.prefetch("fruits.suppliers", "fruits.season")
+
+            Args:
+                *paths (str): Paths of field attribute names separated by dots. All
+                    fields but the last must be linked record fields.
+
+            Raises:
+                ValueError: A path does not go through linked record fields.
+
+            Returns:
+                airstorm.model_list.ModelList: These records.
+            """
+            _prefetch(self._model, list(self), _prefetch_tree(paths))
+            return self
+
         methods = {
             "__init__": __init__,
             "delete": delete,
@@ -91,35 +162,201 @@ class ModelList(type):
             "push": push,
             "grouped": grouped,
             "filtered": filtered,
+            "ranged": ranged,
             "split": split,
             "sorted": sorted_,
+            "columns": columns,
+            "prefetch": prefetch,
         }
         dict_.update(methods)
 
         class_ = super(ModelList, cls).__new__(cls, name, bases, dict_)
         class_._model._base._model_list_by_id[class_._model._id] = class_
 
-        # Looping throught the model fields and creating FieldList "properties" for the
-        # class.
-        for attribute_name in dir(class_._model):
-            field = getattr(class_._model, attribute_name)
-            if isinstance(field, Field):
-                setattr(class_, inflection.pluralize(attribute_name), FieldList(field))
+        # Creating FieldList "properties" for the fields of the model. Fields whose
+        # attribute name was taken by another field are not reachable.
+        model = class_._model
+        for field_id, field in model._field_by_id.items():
+            if getattr(model, field._attribute_name, None) is field:
+                attribute_name = model._list_attribute_names[field_id]
+                setattr(class_, attribute_name, FieldList(field))
         return class_
 
-    def find(cls, formula=""):
+    def find(cls, formula="", fields=None):
         """Return records with specific field value.
 
+        Example:
+            >>> base.SmoothyList.find(fields=[base.Smoothy.name, base.Smoothy.fruits])
+
         Args: formula (str, optional): A airtable formula to filter the search. Lean
             more about writing valid formulas at
             https://support.airtable.com/hc/en-us/articles/203255215-Formula-Field-Reference.
+            fields (list, optional): The fields or field names to download, all of
+                them if omitted. Other fields are fetched when first accessed.
 
         Returns:
             airstorm.model_list.ModelList: The found records.
         """
         # pylint: disable=protected-access, no-value-for-parameter
-        cache_records = cls._model._cache.select(formula=formula)
+        cache_records = cls._model._cache.select(formula=formula, fields=fields)
         records = []
         for id_ in cache_records:
             records.append(cls._model(id_))
         return cls(*records)
+
+    def iter_find(cls, formula="", page_size=100, cache=True, prefetch=True):
+        """Iterate over the records matching a formula as their pages are fetched
+        instead of loading all of them first, which keeps memory bounded for large
+        tables.
+
+        Example:
+            >>> total = 0
+            >>> for fruit in base.FruitList.iter_find(cache=False):
+            ...     total += len(fruit.smoothies)
+
+        Args:
+            formula (str, optional): A airtable formula to filter the search.
+            page_size (int, optional): The amount of records fetched per request, up
+                to 100.
+            cache (bool, optional): Cache the records. Records that are not cached
+                hold their own data and are released once no longer referenced.
+            prefetch (bool, optional): Fetch the next page in the background while
+                the records of the current page are being processed.
+
+        Yields:
+            airstorm.model.Model: The found records.
+        """
+        # pylint: disable=protected-access
+        model = cls._model
+        pages = model._cache.iter_select(
+            formula=formula, page_size=page_size, cache=cache, prefetch=prefetch
+        )
+        for page in pages:
+            for record in page:
+                if cache or model._indexed:
+                    yield model(record["id"])
+                else:
+                    yield model.detached(record)
+
+
+def _prefetch(model, records, tree):
+    """Fetch the records linked to records along a tree of field attribute names,
+    one hop at a time.
+    """
+    # pylint: disable=protected-access
+    fields = _prefetch_fields(model, tree)
+    model._cache.fetch_fields([_._record_id for _ in records], list(fields))
+    for field, subtree in fields.items():
+        if field._schema["type"] != "foreignKey":
+            continue
+        linked_model, ids = _linked_ids(field, records)
+        if not linked_model._indexed:
+            linked_model._cache.fetch_many(ids)
+        if subtree:
+            linked_records = [linked_model(_) for _ in ids]
+            _prefetch(linked_model, [_ for _ in linked_records if _], subtree)
+
+
+def _prefetch_tree(paths):
+    """Merge dotted paths of field attribute names into a tree."""
+    tree = {}
+    for path in paths:
+        node = tree
+        for attribute_name in path.split("."):
+            node = node.setdefault(attribute_name, {})
+    return tree
+
+
+def _prefetch_fields(model, tree):
+    """Return the fields of the first level of a prefetch tree with their subtree,
+    making sure only linked record fields have subtrees.
+    """
+    # pylint: disable=protected-access
+    fields = {}
+    for attribute_name, subtree in tree.items():
+        field = getattr(model, attribute_name, None)
+        if not isinstance(field, Field):
+            raise ValueError("{} is not a field of {}.".format(attribute_name, model))
+        if subtree and field._schema["type"] != "foreignKey":
+            raise ValueError("{} is not a linked record field.".format(field))
+        fields[field] = subtree
+    return fields
+
+
+def _linked_ids(field, records):
+    """Return the linked model of a linked record field and the ids it links
+    records to.
+    """
+    # pylint: disable=protected-access
+    ids = {}
+    for record in records:
+        ids.update(dict.fromkeys(field.raw_value(record) or []))
+    table_id = field._schema["typeOptions"]["foreignTableId"]
+    return field._model._base._model_by_id[table_id], list(ids)
+
+
+def _field_getter(model, field):
+    """Return a function reading the value of a field for a record. The value is read
+    from the field index when there is one as it is much faster.
+    """
+    # pylint: disable=protected-access
+    attribute_name = field._attribute_name
+    field_index = model._cache.field_index(field)
+    if field_index is None:
+        return lambda record: getattr(record, attribute_name)
+
+    def get(record):
+        if not record._changes and field_index.covers(record._record_id):
+            return field_index.value(record._record_id)
+        return getattr(record, attribute_name)
+
+    return get
+
+
+def _field_matcher(model, field, value):
+    """Return a function testing whether the field of a record is equal to a value.
+    The matching ids are looked up once in the field index when there is one.
+    """
+    # pylint: disable=protected-access
+    field_index = model._cache.field_index(field)
+    try:
+        ids = field_index.lookup(value) if field_index else None
+    except TypeError:
+        ids = None
+    if ids is None:
+        get = _field_getter(model, field)
+        return lambda record: get(record) == value
+    return _index_matcher(field_index, ids, lambda _: _ == value)
+
+
+def _range_matcher(model, field, low, high):
+    """Return a function testing whether the field of a record is within a range.
+    The matching ids are looked up once in the field index when it is ordered.
+    """
+    # pylint: disable=protected-access
+
+    def in_range(value):
+        if value is None:
+            return False
+        return (low is None or value >= low) and (high is None or value <= high)
+
+    field_index = model._cache.field_index(field)
+    if not isinstance(field_index, SortedFieldIndex):
+        get = _field_getter(model, field)
+        return lambda record: in_range(get(record))
+    return _index_matcher(field_index, set(field_index.range(low, high)), in_range)
+
+
+def _index_matcher(field_index, ids, test):
+    """Return a function matching records by id when they are covered by the field
+    index, and by testing their field value otherwise.
+    """
+    # pylint: disable=protected-access
+    attribute_name = field_index._field._attribute_name
+
+    def match(record):
+        if not record._changes and field_index.covers(record._record_id):
+            return record._record_id in ids
+        return test(getattr(record, attribute_name))
+
+    return match
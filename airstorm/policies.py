@@ -0,0 +1,142 @@
+import collections
+import threading
+
+
+class CachePolicy:
+    """Policy bounding the memory used by the caches of one or more tables and how
+    long their records stay fresh.
+
+    When a cache goes over budget the least recently used records are evicted, and
+    fetched again if accessed later. Expired records are fetched again when
+    accessed, along with all the other records of the table that expired. Records
+    of indexed tables are never evicted and never expire, refresh them instead.
+
+    Args:
+        max_records (int, optional): The maximum amount of records cached.
+        max_bytes (int, optional): The approximate maximum size of the records
+            cached, estimated from their representation.
+        shared (bool, optional): Share the budget between all the tables using this
+            policy instead of applying it to each table, which allows bounding the
+            memory used by an entire base.
+        ttl (float, optional): The amount of seconds records stay fresh.
+        negative_ttl (float, optional): The amount of seconds records that were not
+            found are cached as missing. Defaults to `ttl`.
+    """
+
+    def __init__(
+        self,
+        max_records=None,
+        max_bytes=None,
+        shared=False,
+        ttl=None,
+        negative_ttl=None,
+    ):
+        object.__init__(self)
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._shared_tracker = None
+
+    @property
+    def limited(self):
+        """bool: Whether the policy bounds the size of caches."""
+        return self.max_records is not None or self.max_bytes is not None
+
+    def tracker(self):
+        """Return the tracker enforcing the budget for a new cache.
+
+        Returns:
+            airstorm.policies.LruTracker: The tracker, which is the same for all
+                caches when the budget is shared, or None if the policy is not
+                limited.
+        """
+        if not self.limited:
+            return None
+        if not self.shared:
+            return LruTracker(self.max_records, self.max_bytes)
+        if self._shared_tracker is None:
+            self._shared_tracker = LruTracker(self.max_records, self.max_bytes)
+        return self._shared_tracker
+
+
+class LruTracker:
+    """Track the recency of records across caches and evict the least recently used
+    ones when over budget.
+
+    Args:
+        max_records (int, optional): The maximum amount of records.
+        max_bytes (int, optional): The approximate maximum size of the records.
+    """
+
+    def __init__(self, max_records=None, max_bytes=None):
+        object.__init__(self)
+        self._max_records = max_records
+        self._max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def bytes(self):
+        """int: The approximate size of the tracked records."""
+        return self._bytes
+
+    def touch(self, cache, key: str):
+        """Mark a record as recently used.
+
+        Args:
+            cache (airstorm.cache.Cache): The cache holding the record.
+            key (str): The id of the record.
+        """
+        with self._lock:
+            try:
+                self._entries.move_to_end((id(cache), key))
+            except KeyError:
+                pass
+
+    def add(self, cache, key: str, value: dict):
+        """Track a record that was just cached and evict records if over budget.
+
+        Args:
+            cache (airstorm.cache.Cache): The cache holding the record.
+            key (str): The id of the record.
+            value (dict): The record data.
+        """
+        size = len(repr(value)) if self._max_bytes is not None else 0
+        evicted = []
+        with self._lock:
+            entry_key = (id(cache), key)
+            previous = self._entries.pop(entry_key, None)
+            if previous:
+                self._bytes -= previous[1]
+            self._entries[entry_key] = (cache, size)
+            self._bytes += size
+            # The record just added is never evicted.
+            while len(self._entries) > 1 and self._over_budget():
+                (_, evicted_key), entry = self._entries.popitem(last=False)
+                self._bytes -= entry[1]
+                evicted.append((entry[0], evicted_key))
+        for evicted_cache, evicted_key in evicted:
+            evicted_cache._evict(evicted_key)  # pylint: disable=protected-access
+
+    def discard(self, cache, key: str):
+        """Stop tracking a record.
+
+        Args:
+            cache (airstorm.cache.Cache): The cache holding the record.
+            key (str): The id of the record.
+        """
+        with self._lock:
+            entry = self._entries.pop((id(cache), key), None)
+            if entry:
+                self._bytes -= entry[1]
+
+    def _over_budget(self):
+        if self._max_records is not None and len(self._entries) > self._max_records:
+            return True
+        return self._max_bytes is not None and self._bytes > self._max_bytes
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import HTTPError
+
+# Status codes worth retrying. Airtable answers 429 when the rate limit is exceeded.
+_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Methods that can be sent again without side effects should the first request have
+# been processed despite failing. Other methods are only retried on rate limits.
+_IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "PATCH", "DELETE")
+
+
+class Scheduler:
+    """Schedule the requests made to a base from any number of threads so that they
+    stay within the Airtable rate limit.
+
+    Requests are granted by a token bucket in the order they were submitted.
+    Requests failing with a rate limit or server error are retried with a jittered
+    exponential backoff, during which the whole queue is held back. Requests that
+    are not idempotent, such as record creations, are only retried on rate limits
+    since they might have been processed despite the error.
+
+    Args:
+        rate (float, optional): The maximum amount of requests per second. Defaults
+            to the Airtable limit of 5 requests per second per base.
+        burst (int, optional): The amount of requests that can be made at once after
+            being idle.
+        max_retries (int, optional): The maximum amount of retries per request.
+        backoff (float, optional): The delay in seconds before the first retry. It
+            doubles on each following retry.
+        max_backoff (float, optional): The maximum delay in seconds between retries.
+    """
+
+    def __init__(self, rate=5.0, burst=1, max_retries=5, backoff=1.0, max_backoff=30.0):
+        object.__init__(self)
+        self._rate = rate
+        self._burst = burst
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._queue_depth = 0
+        # Total seconds requests were held back for, so that requests waiting for
+        # their turn get held back too.
+        self._held = 0.0
+        self._stats = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "max_queue_depth": 0,
+            "wait_time": 0.0,
+            "max_wait_time": 0.0,
+        }
+
+    def submit(self, request, method="GET"):
+        """Make a request as soon as the rate limit allows it, retrying it if needed.
+
+        Args:
+            request (callable): The function making the request.
+            method (str, optional): The HTTP method of the request.
+
+        Raises:
+            requests.exceptions.RequestException: The request failed and cannot or
+                should not be retried anymore.
+
+        Returns:
+            The result of the request.
+        """
+        attempt = 0
+        while True:
+            self.acquire()
+            try:
+                return request()
+            except (HTTPError, RequestsConnectionError) as error:
+                response = getattr(error, "response", None)
+                status_code = getattr(response, "status_code", None)
+                connection_error = isinstance(error, RequestsConnectionError)
+                if not self.retry(
+                    status_code or error, attempt, connection_error, method=method
+                ):
+                    raise
+                attempt += 1
+
+    def retry(self, failure, attempt: int, connection_error=False, method="GET"):
+        """Decide whether a failed request should be retried, and if so hold back
+        all requests for a jittered exponential backoff.
+
+        Args:
+            failure (int, Exception): The status code of the response, or the error
+                for requests that did not get one.
+            attempt (int): The amount of times the request was already retried.
+            connection_error (bool, optional): Whether the request failed to
+                connect, which is worth retrying for idempotent requests.
+            method (str, optional): The HTTP method of the request.
+
+        Returns:
+            bool: Whether the request should be retried.
+        """
+        if method.upper() in _IDEMPOTENT_METHODS:
+            retry = connection_error or failure in _RETRY_STATUS_CODES
+        else:
+            retry = failure == 429
+        if not retry or attempt >= self._max_retries:
+            with self._lock:
+                self._stats["failures"] += 1
+            return False
+        delay = min(self._backoff * 2 ** attempt, self._max_backoff)
+        delay = random.uniform(delay / 2, delay)
+        logging.warning(
+            "Request failed with {}, retrying in {:.2f}s.".format(failure, delay)
+        )
+        self.hold(delay)
+        with self._lock:
+            self._stats["retries"] += 1
+        return True
+
+    def acquire(self):
+        """Block until a request can be made."""
+        wait, held = self._reserve()
+        while wait:
+            time.sleep(wait)
+            wait, held = self._extra_wait(held)
+        with self._lock:
+            self._queue_depth -= 1
+
+    async def acquire_async(self):
+        """Wait until a request can be made without blocking the event loop."""
+        wait, held = self._reserve()
+        while wait:
+            await asyncio.sleep(wait)
+            wait, held = self._extra_wait(held)
+        with self._lock:
+            self._queue_depth -= 1
+
+    def _extra_wait(self, held):
+        """Return how much longer a request must wait because of the holds that
+        happened while it was waiting, along with the total held time."""
+        with self._lock:
+            return self._held - held, self._held
+
+    def _reserve(self):
+        """Take a token and return how long to wait for it to be available, along
+        with the total held time."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            # A negative amount of tokens means requests are queued before us.
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+            self._queue_depth += 1
+            self._stats["requests"] += 1
+            self._stats["max_queue_depth"] = max(
+                self._stats["max_queue_depth"], self._queue_depth
+            )
+            self._stats["wait_time"] += wait
+            self._stats["max_wait_time"] = max(self._stats["max_wait_time"], wait)
+            held = self._held
+        return wait, held
+
+    def hold(self, delay: float):
+        """Hold back all requests, including the ones already queued, for a delay.
+
+        Args:
+            delay (float): The delay in seconds.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - delay * self._rate
+            self._held += delay
+
+    def stats(self):
+        """Return statistics about the requests made so far.
+
+        Returns:
+            dict: The amount of requests, retries and failures, the current and
+                maximum queue depth and the total, average and maximum time spent
+                waiting in the queue.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["queue_depth"] = self._queue_depth
+        requests = stats["requests"]
+        stats["average_wait_time"] = stats["wait_time"] / requests if requests else 0.0
+        return stats
+
+    def _refill(self, now):
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+
+from .functions import to_plural, to_singular_pascal_case, to_snake_case
+
+# Version of the compiled schema format. Artifacts of another version are compiled
+# again when loaded.
+COMPILED_SCHEMA_VERSION = 1
+
+
+def compile_schema(schema: dict, to_model_name=to_singular_pascal_case):
+    """Compile a schema along with all the names derived from it, so that a base can
+    be initialized from it without converting any name.
+
+    Example:
+        >>> compiled = compile_schema(schema)
+        >>> base = Base(base_id, api_key, compiled)
+
+    Args:
+        schema (dict): A dictionary representing the schema.
+        to_model_name (callable, optional): Transform table into model class names.
+
+    Returns:
+        dict: The compiled schema, which can be saved as JSON.
+    """
+    return {
+        "version": COMPILED_SCHEMA_VERSION,
+        "checksum": _checksum(schema, to_model_name),
+        "schema": schema,
+        "tables": {
+            table_schema["id"]: compile_table(
+                table_schema, to_model_name(table_schema["name"])
+            )
+            for table_schema in schema["tables"]
+        },
+    }
+
+
+def compile_table(table_schema: dict, model_name: str):
+    """Compile the names derived from the schema of a table.
+
+    Args:
+        table_schema (dict): The schema of the table.
+        model_name (str): The name of the model class of the table.
+
+    Returns:
+        dict: The model name, the attribute names of the fields on models and
+            model lists by field id and the attribute name of the primary field.
+    """
+    attribute_names = {}
+    list_attribute_names = {}
+    primary_attribute_name = ""
+    for field_schema in table_schema["columns"]:
+        attribute_name = to_snake_case(field_schema["name"])
+        attribute_names[field_schema["id"]] = attribute_name
+        list_attribute_names[field_schema["id"]] = to_plural(attribute_name)
+        if field_schema["name"] == table_schema["primaryColumnName"]:
+            primary_attribute_name = attribute_name
+    if not primary_attribute_name:
+        primary_attribute_name = to_snake_case(table_schema["primaryColumnName"])
+    return {
+        "model_name": model_name,
+        "attribute_names": attribute_names,
+        "list_attribute_names": list_attribute_names,
+        "primary_attribute_name": primary_attribute_name,
+    }
+
+
+def is_compiled(schema: dict):
+    """Whether a schema is compiled.
+
+    Args:
+        schema (dict): The schema.
+
+    Returns:
+        bool: Whether the schema was returned by `compile_schema`.
+    """
+    return "version" in schema and "checksum" in schema
+
+
+def load_compiled_schema(path: str, schema=None, to_model_name=to_singular_pascal_case):
+    """Load a compiled schema from a file. The schema is compiled and saved again
+    when the file does not exist, is of another version or, when a schema is
+    provided, was compiled from a different schema.
+
+    Args:
+        path (str): The path of the compiled schema file.
+        schema (dict, optional): The schema the file should be compiled from.
+        to_model_name (callable, optional): Transform table into model class names.
+
+    Raises:
+        ValueError: The file cannot be used and there is no schema to compile.
+
+    Returns:
+        dict: The compiled schema.
+    """
+    compiled = None
+    if os.path.exists(path):
+        with open(path) as file_:
+            compiled = json.load(file_)
+        if compiled.get("version") != COMPILED_SCHEMA_VERSION:
+            compiled = None
+        elif schema is not None:
+            if compiled.get("checksum") != _checksum(schema, to_model_name):
+                compiled = None
+    if compiled is not None:
+        return compiled
+    if schema is None:
+        raise ValueError("{} is not a usable compiled schema.".format(path))
+    compiled = compile_schema(schema, to_model_name=to_model_name)
+    save_compiled_schema(compiled, path)
+    return compiled
+
+
+def save_compiled_schema(compiled: dict, path: str):
+    """Save a compiled schema to a file.
+
+    Args:
+        compiled (dict): The compiled schema.
+        path (str): The path of the file.
+    """
+    # Written aside first so that concurrent processes never read a partial file.
+    temporary_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(temporary_path, "w") as file_:
+        json.dump(compiled, file_)
+    os.replace(temporary_path, path)
+
+
+def _checksum(schema, to_model_name):
+    """Return a checksum of a schema and of the function naming its models."""
+    hash_ = hashlib.sha1(json.dumps(schema, sort_keys=True).encode("utf-8"))
+    name = "{}.{}".format(
+        getattr(to_model_name, "__module__", ""),
+        getattr(to_model_name, "__qualname__", repr(to_model_name)),
+    )
+    hash_.update(name.encode("utf-8"))
+    return hash_.hexdigest()
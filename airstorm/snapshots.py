@@ -0,0 +1,245 @@
+import json
+import mmap
+import struct
+
+# Snapshot files start with this magic and version, followed by the length of a
+# JSON header locating the sections of the file relative to the end of the header.
+_MAGIC = b"ASNP"
+_VERSION = 1
+_PREAMBLE = struct.Struct("<4sII")
+_OFFSET = struct.Struct("<Q")
+_INDEX = struct.Struct("<I")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+
+# Value tags.
+_NONE, _FALSE, _TRUE, _INTEGER, _NUMBER, _STRING, _LIST, _DICT, _JSON = range(9)
+
+
+def write_snapshot(path: str, records_by_table: dict):
+    """Write records to a compact binary snapshot file.
+
+    Strings, including field names and linked record ids, are stored once in a
+    pool that records point to. Each table has an index of the offset of each
+    record so that records can be decoded one by one when loaded.
+
+    Args:
+        path (str): The path of the snapshot file.
+        records_by_table (dict): The record data by table id.
+    """
+    strings = {}
+    body = bytearray()
+    tables = {}
+    for table_id, records in records_by_table.items():
+        ids = []
+        offsets = [0]
+        data = bytearray()
+        for record in records:
+            ids.append(record["id"])
+            _encode(record, data, strings)
+            offsets.append(len(data))
+        ids = "\n".join(ids).encode("utf-8")
+        tables[table_id] = {
+            "count": len(offsets) - 1,
+            "offsets": len(body),
+            "ids": [len(body) + len(offsets) * _OFFSET.size, len(ids)],
+            "data": len(body) + len(offsets) * _OFFSET.size + len(ids),
+        }
+        body += b"".join(_OFFSET.pack(_) for _ in offsets)
+        body += ids
+        body += data
+
+    pool = [_.encode("utf-8") for _ in strings]
+    pool_offsets = [0]
+    for string in pool:
+        pool_offsets.append(pool_offsets[-1] + len(string))
+    header = {
+        "strings": {
+            "count": len(pool),
+            "offsets": len(body),
+            "data": len(body) + len(pool_offsets) * _OFFSET.size,
+        },
+        "tables": tables,
+    }
+    body += b"".join(_OFFSET.pack(_) for _ in pool_offsets)
+    body += b"".join(pool)
+
+    header = json.dumps(header).encode("utf-8")
+    with open(path, "wb") as file_:
+        file_.write(_PREAMBLE.pack(_MAGIC, _VERSION, len(header)))
+        file_.write(header)
+        file_.write(body)
+
+
+class Snapshot:
+    """Snapshot file memory-mapped for reading. Opening it only reads its header,
+    records are decoded when loaded.
+
+    Args:
+        path (str): The path of the snapshot file.
+
+    Raises:
+        ValueError: The file is not a snapshot or of an unsupported version.
+    """
+
+    def __init__(self, path: str):
+        object.__init__(self)
+        with open(path, "rb") as file_:
+            self._buffer = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, length = _PREAMBLE.unpack_from(self._buffer, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("{} is not a supported snapshot file.".format(path))
+        start = _PREAMBLE.size
+        self._body = start + length
+        header = json.loads(self._buffer[start:self._body].decode("utf-8"))
+        strings = header["strings"]
+        self._string_offsets = self._body + strings["offsets"]
+        self._string_data = self._body + strings["data"]
+        # Decoded strings, so that records share them.
+        self._strings = {}
+        self._tables = {
+            table_id: SnapshotTable(self, table)
+            for table_id, table in header["tables"].items()
+        }
+
+    @property
+    def tables(self):
+        """dict: The tables of the snapshot by table id."""
+        return self._tables
+
+    def _string(self, index):
+        string = self._strings.get(index)
+        if string is None:
+            position = self._string_offsets + index * _OFFSET.size
+            start, end = struct.unpack_from("<QQ", self._buffer, position)
+            start += self._string_data
+            end += self._string_data
+            string = self._buffer[start:end].decode("utf-8")
+            self._strings[index] = string
+        return string
+
+    def _decode(self, position):
+        """Decode the value at a position, returning it with the position of the
+        next value."""
+        tag = self._buffer[position]
+        position += 1
+        if tag == _STRING:
+            return self._string(_INDEX.unpack_from(self._buffer, position)[0]), (
+                position + _INDEX.size
+            )
+        if tag == _INTEGER:
+            return _INT.unpack_from(self._buffer, position)[0], position + _INT.size
+        if tag == _NUMBER:
+            return _FLOAT.unpack_from(self._buffer, position)[0], position + _FLOAT.size
+        if tag in (_LIST, _DICT):
+            count = _INDEX.unpack_from(self._buffer, position)[0]
+            position += _INDEX.size
+            if tag == _LIST:
+                items = []
+                for _ in range(count):
+                    item, position = self._decode(position)
+                    items.append(item)
+                return items, position
+            items = {}
+            for _ in range(count):
+                key = self._string(_INDEX.unpack_from(self._buffer, position)[0])
+                items[key], position = self._decode(position + _INDEX.size)
+            return items, position
+        if tag == _JSON:
+            string, position = self._decode(position)
+            return json.loads(string), position
+        return {_NONE: None, _FALSE: False, _TRUE: True}[tag], position
+
+
+class SnapshotTable:
+    """Records of a table in a snapshot, decoded on demand.
+
+    Args:
+        snapshot (airstorm.snapshots.Snapshot): The snapshot.
+        table (dict): The location of the table sections in the snapshot.
+    """
+
+    def __init__(self, snapshot, table):
+        object.__init__(self)
+        self._snapshot = snapshot
+        body = snapshot._body  # pylint: disable=protected-access
+        self._offsets = body + table["offsets"]
+        self._data = body + table["data"]
+        start, length = table["ids"]
+        start += body
+        end = start + length
+        ids = snapshot._buffer[start:end]
+        ids = ids.decode("utf-8").split("\n") if table["count"] else []
+        # Position of each record that has not been loaded yet, by id.
+        self._index_by_id = dict(zip(ids, range(len(ids))))
+
+    def __len__(self):
+        return len(self._index_by_id)
+
+    def __contains__(self, id_):
+        return id_ in self._index_by_id
+
+    def ids(self):
+        """Return the ids of the records that were not loaded yet.
+
+        Returns:
+            list: The ids.
+        """
+        return list(self._index_by_id)
+
+    def pop(self, id_):
+        """Decode a record and forget about it, as it is now cached.
+
+        Args:
+            id_ (str): The id of the record.
+
+        Raises:
+            KeyError: The record is not part of the snapshot or was already loaded.
+
+        Returns:
+            dict: The record data.
+        """
+        index = self._index_by_id.pop(id_)
+        position = self._offsets + index * _OFFSET.size
+        offset = _OFFSET.unpack_from(self._snapshot._buffer, position)[0]
+        # pylint: disable=protected-access
+        return self._snapshot._decode(self._data + offset)[0]
+
+    def discard(self, id_):
+        """Forget about a record, for instance because it was cached since.
+
+        Args:
+            id_ (str): The id of the record.
+        """
+        self._index_by_id.pop(id_, None)
+
+
+def _encode(value, buffer, strings):
+    """Encode a value at the end of a buffer, adding its strings to the pool."""
+    if value is None:
+        buffer.append(_NONE)
+    elif isinstance(value, bool):
+        buffer.append(_TRUE if value else _FALSE)
+    elif isinstance(value, str):
+        buffer.append(_STRING)
+        buffer += _INDEX.pack(strings.setdefault(value, len(strings)))
+    elif isinstance(value, int) and -(2 ** 63) <= value < 2 ** 63:
+        buffer.append(_INTEGER)
+        buffer += _INT.pack(value)
+    elif isinstance(value, float):
+        buffer.append(_NUMBER)
+        buffer += _FLOAT.pack(value)
+    elif isinstance(value, list):
+        buffer.append(_LIST)
+        buffer += _INDEX.pack(len(value))
+        for item in value:
+            _encode(item, buffer, strings)
+    elif isinstance(value, dict) and all(isinstance(_, str) for _ in value):
+        buffer.append(_DICT)
+        buffer += _INDEX.pack(len(value))
+        for key, item in value.items():
+            buffer += _INDEX.pack(strings.setdefault(key, len(strings)))
+            _encode(item, buffer, strings)
+    else:
+        buffer.append(_JSON)
+        _encode(json.dumps(value), buffer, strings)
@@ -0,0 +1,329 @@
+import abc
+import contextlib
+import json
+import sqlite3
+import time
+import uuid
+
+
+class Store(abc.ABC):
+    """A store persists the records of indexed tables so that they can be loaded
+    back by another process instead of downloading the table again.
+
+    Stores can also share the records of tables that are not indexed, so that a
+    record fetched by a process serves all the processes using the store, for
+    instance the pre-forked workers of a server.
+
+    Args:
+        max_age (float, optional): The age in seconds after which a saved table is
+            considered stale and will be downloaded again. Never expires by default.
+        share_records (bool, optional): Share the records of tables that are not
+            indexed.
+    """
+
+    def __init__(self, max_age=None, share_records=False):
+        object.__init__(self)
+        self._max_age = max_age
+        self._share_records = share_records
+
+    @property
+    def shares_records(self):
+        """bool: Whether the records of tables that are not indexed are shared."""
+        return self._share_records
+
+    def lock(self, base_id: str, table_id: str):
+        """Return a context manager holding a table exclusively, so that processes
+        starting together download it once.
+
+        Args:
+            base_id (str): The id of the base the table belongs to.
+            table_id (str): The id of the table.
+
+        Returns:
+            contextlib.AbstractContextManager: The lock.
+        """
+        return contextlib.nullcontext()
+
+    def load_records(self, base_id: str, table_id: str, record_ids: list, max_age=None):
+        """Load shared records.
+
+        Args:
+            base_id (str): The id of the base the table belongs to.
+            table_id (str): The id of the table.
+            record_ids (list): The ids of the records.
+            max_age (float, optional): The age in seconds from which records are
+                considered stale, on top of the max age of the store.
+
+        Returns:
+            dict: Tuples of the record and the time it was shared at, by id, for
+                the records found that are not stale.
+        """
+        return {}
+
+    def save_records(self, base_id: str, table_id: str, records: list):
+        """Share records, replacing the ones previously shared.
+
+        Args:
+            base_id (str): The id of the base the table belongs to.
+            table_id (str): The id of the table.
+            records (list): The records.
+        """
+
+    def delete_records(self, base_id: str, table_id: str, record_ids: list):
+        """Stop sharing records, for instance because they were deleted.
+
+        Args:
+            base_id (str): The id of the base the table belongs to.
+            table_id (str): The id of the table.
+            record_ids (list): The ids of the records.
+        """
+
+    @abc.abstractmethod
+    def load(self, base_id: str, table_id: str):
+        """Load the records of a table.
+
+        Args:
+            base_id (str): The id of the base the table belongs to.
+            table_id (str): The id of the table.
+
+        Returns:
+            list: The records, or None if the table was never saved or is stale.
+        """
+
+    @abc.abstractmethod
+    def saved_at(self, base_id: str, table_id: str):
+        """Return when a table was saved.
+
+        Args:
+            base_id (str): The id of the base the table belongs to.
+            table_id (str): The id of the table.
+
+        Returns:
+            float: The time the table was saved at, or None if it was never saved.
+        """
+
+    @abc.abstractmethod
+    def save(self, base_id: str, table_id: str, records: list):
+        """Save the records of a table, replacing the ones previously saved.
+
+        Args:
+            base_id (str): The id of the base the table belongs to.
+            table_id (str): The id of the table.
+            records (list): The records.
+        """
+
+    def is_stale(self, saved_at: float):
+        """Whether a table saved at the given time should be downloaded again.
+
+        Args:
+            saved_at (float): The time the table was saved at.
+
+        Returns:
+            bool: Whether the table is stale.
+        """
+        return self._max_age is not None and time.time() - saved_at > self._max_age
+
+
+class SqliteStore(Store):
+    """Store records in a local SQLite database file, which processes of the same
+    host can use concurrently.
+
+    Args:
+        path (str): The path of the database file. Created if it does not exist.
+        max_age (float, optional): The age in seconds after which a saved table is
+            considered stale and will be downloaded again. Never expires by default.
+        share_records (bool, optional): Share the records of tables that are not
+            indexed.
+    """
+
+    # Seconds after which the lock of a process that died holding it is released.
+    _lock_lease = 300
+    # Seconds between attempts at acquiring a lock held by another process.
+    _lock_interval = 0.05
+    # Maximum amount of variables of a SQLite statement.
+    _max_variables = 900
+
+    def __init__(self, path: str, max_age=None, share_records=False):
+        Store.__init__(self, max_age=max_age, share_records=share_records)
+        self._path = path
+        connection = self._connect()
+        try:
+            self._enable_wal(connection)
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS snapshots ("
+                    "base_id TEXT, table_id TEXT, saved_at REAL, "
+                    "PRIMARY KEY (base_id, table_id))"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS records ("
+                    "base_id TEXT, table_id TEXT, record_id TEXT, data TEXT, "
+                    "PRIMARY KEY (base_id, table_id, record_id))"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS shared_records ("
+                    "base_id TEXT, table_id TEXT, record_id TEXT, data TEXT, "
+                    "saved_at REAL, PRIMARY KEY (base_id, table_id, record_id))"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS locks ("
+                    "base_id TEXT, table_id TEXT, owner TEXT, expires_at REAL, "
+                    "PRIMARY KEY (base_id, table_id))"
+                )
+        finally:
+            connection.close()
+
+    def _enable_wal(self, connection):
+        """Let processes read while another one writes. Switching the journal mode
+        fails right away rather than waiting while other processes open the
+        database, which is why it is attempted again.
+        """
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                return
+            except sqlite3.OperationalError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(self._lock_interval)
+
+    def _connect(self):
+        # A connection per operation keeps the store usable across threads and
+        # processes.
+        return sqlite3.connect(self._path, timeout=30)
+
+    def load(self, base_id, table_id):
+        connection = self._connect()
+        try:
+            saved_at = self._saved_at(connection, base_id, table_id)
+            if saved_at is None or self.is_stale(saved_at):
+                return None
+            rows = connection.execute(
+                "SELECT data FROM records WHERE base_id = ? AND table_id = ?",
+                (base_id, table_id),
+            )
+            return [json.loads(data) for data, in rows]
+        finally:
+            connection.close()
+
+    def saved_at(self, base_id, table_id):
+        connection = self._connect()
+        try:
+            return self._saved_at(connection, base_id, table_id)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _saved_at(connection, base_id, table_id):
+        row = connection.execute(
+            "SELECT saved_at FROM snapshots WHERE base_id = ? AND table_id = ?",
+            (base_id, table_id),
+        ).fetchone()
+        return row[0] if row else None
+
+    def save(self, base_id, table_id, records):
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "DELETE FROM records WHERE base_id = ? AND table_id = ?",
+                    (base_id, table_id),
+                )
+                connection.executemany(
+                    "INSERT INTO records VALUES (?, ?, ?, ?)",
+                    (
+                        (base_id, table_id, record["id"], json.dumps(record))
+                        for record in records
+                    ),
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)",
+                    (base_id, table_id, time.time()),
+                )
+        finally:
+            connection.close()
+
+    @contextlib.contextmanager
+    def lock(self, base_id, table_id):
+        owner = uuid.uuid4().hex
+        while not self._acquire(base_id, table_id, owner):
+            time.sleep(self._lock_interval)
+        try:
+            yield
+        finally:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.execute("DELETE FROM locks WHERE owner = ?", (owner,))
+            finally:
+                connection.close()
+
+    def _acquire(self, base_id, table_id, owner):
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "DELETE FROM locks "
+                    "WHERE base_id = ? AND table_id = ? AND expires_at < ?",
+                    (base_id, table_id, now),
+                )
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO locks VALUES (?, ?, ?, ?)",
+                    (base_id, table_id, owner, now + self._lock_lease),
+                )
+                return bool(cursor.rowcount)
+        finally:
+            connection.close()
+
+    def load_records(self, base_id, table_id, record_ids, max_age=None):
+        now = time.time()
+        records = {}
+        connection = self._connect()
+        try:
+            for start in range(0, len(record_ids), self._max_variables):
+                end = start + self._max_variables
+                chunk = record_ids[start:end]
+                rows = connection.execute(
+                    "SELECT data, saved_at FROM shared_records "
+                    "WHERE base_id = ? AND table_id = ? AND record_id IN ({})".format(
+                        ", ".join("?" * len(chunk))
+                    ),
+                    [base_id, table_id] + list(chunk),
+                )
+                for data, saved_at in rows:
+                    expired = max_age is not None and now - saved_at >= max_age
+                    if not expired and not self.is_stale(saved_at):
+                        record = json.loads(data)
+                        records[record["id"]] = (record, saved_at)
+            return records
+        finally:
+            connection.close()
+
+    def save_records(self, base_id, table_id, records):
+        saved_at = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO shared_records VALUES (?, ?, ?, ?, ?)",
+                    (
+                        (base_id, table_id, _["id"], json.dumps(_), saved_at)
+                        for _ in records
+                    ),
+                )
+        finally:
+            connection.close()
+
+    def delete_records(self, base_id, table_id, record_ids):
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "DELETE FROM shared_records "
+                    "WHERE base_id = ? AND table_id = ? AND record_id = ?",
+                    ((base_id, table_id, _) for _ in record_ids),
+                )
+        finally:
+            connection.close()
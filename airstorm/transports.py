@@ -0,0 +1,178 @@
+import abc
+import json
+import threading
+
+import requests
+
+from airtable.auth import AirtableAuth
+from requests.adapters import HTTPAdapter
+
+
+class Transport(abc.ABC):
+    """A transport sends the requests of the tables of a base and returns their
+    responses. Bases share a single transport between all their tables.
+    """
+
+    @abc.abstractmethod
+    def request(self, method: str, url: str, params=None, json_data=None):
+        """Send a request.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL of the request.
+            params (dict, optional): The query parameters.
+            json_data (dict, optional): The JSON body.
+
+        Returns:
+            requests.Response: The response.
+        """
+
+    def close(self):
+        """Release the resources of the transport."""
+
+
+class HttpTransport(Transport):
+    """Send requests over a pool of keep-alive connections, so that connections
+    and TLS sessions are reused across all the tables of a base.
+
+    Args:
+        api_key (str): The API key of the user.
+        pool_size (int, optional): The maximum amount of connections kept open.
+        timeout (float, tuple, optional): The connect and read timeouts of requests
+            in seconds. Waits forever by default.
+    """
+
+    def __init__(self, api_key: str, pool_size=10, timeout=None):
+        Transport.__init__(self)
+        self._timeout = timeout
+        self._session = requests.Session()
+        self._session.auth = AirtableAuth(api_key=api_key)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def request(self, method, url, params=None, json_data=None):
+        return self._session.request(
+            method, url, params=params, json=json_data, timeout=self._timeout
+        )
+
+    def close(self):
+        self._session.close()
+
+
+class InProcessTransport(Transport):
+    """Answer requests with a function instead of sending them, for instance to
+    test against an in-memory implementation of the API.
+
+    Args:
+        handler (callable): A function taking the method, URL, query parameters
+            and JSON body of a request and returning the status code and JSON data
+            of the response.
+    """
+
+    def __init__(self, handler):
+        Transport.__init__(self)
+        self._handler = handler
+
+    def request(self, method, url, params=None, json_data=None):
+        status_code, data = self._handler(method, url, params, json_data)
+        return _response(method, url, params, status_code, data)
+
+
+class RecordingTransport(Transport):
+    """Record the requests sent through another transport along with their
+    responses, to be replayed offline by `ReplayTransport`.
+
+    Args:
+        transport (airstorm.transports.Transport): The transport sending the
+            requests.
+        path (str): The path of the JSON file the recordings are saved to.
+    """
+
+    def __init__(self, transport, path: str):
+        Transport.__init__(self)
+        self._transport = transport
+        self._path = path
+        self._recordings = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, params=None, json_data=None):
+        response = self._transport.request(
+            method, url, params=params, json_data=json_data
+        )
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        with self._lock:
+            self._recordings.append(
+                {
+                    "request": _request_key(method, url, params, json_data),
+                    "status_code": response.status_code,
+                    "data": data,
+                }
+            )
+        return response
+
+    def save(self):
+        """Save the recordings."""
+        with self._lock:
+            recordings = list(self._recordings)
+        with open(self._path, "w") as file_:
+            json.dump(recordings, file_, indent=1)
+
+    def close(self):
+        self.save()
+        self._transport.close()
+
+
+class ReplayTransport(Transport):
+    """Answer requests with the responses recorded by `RecordingTransport`.
+    Identical requests get the responses recorded for them in order, the last one
+    being repeated.
+
+    Args:
+        path (str): The path of the JSON file holding the recordings.
+    """
+
+    def __init__(self, path: str):
+        Transport.__init__(self)
+        with open(path) as file_:
+            recordings = json.load(file_)
+        self._responses_by_request = {}
+        for recording in recordings:
+            responses = self._responses_by_request.setdefault(recording["request"], [])
+            responses.append((recording["status_code"], recording["data"]))
+        self._lock = threading.Lock()
+
+    def request(self, method, url, params=None, json_data=None):
+        key = _request_key(method, url, params, json_data)
+        with self._lock:
+            responses = self._responses_by_request.get(key)
+            if not responses:
+                raise LookupError("No recorded response for {}.".format(key))
+            if len(responses) > 1:
+                status_code, data = responses.pop(0)
+            else:
+                status_code, data = responses[0]
+        return _response(method, url, params, status_code, data)
+
+
+def _request_key(method, url, params, json_data):
+    """Return a string identifying a request."""
+    return json.dumps(
+        [method.upper(), url, params or {}, json_data], sort_keys=True, default=str
+    )
+
+
+def _response(method, url, params, status_code, data):
+    """Build a response the way requests would have."""
+    request = requests.Request(method.upper(), url, params=params).prepare()
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(data).encode("utf-8")
+    response.headers["Content-Type"] = "application/json"
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    return response
@@ -0,0 +1,4 @@
+"""Benchmarks measuring the performance of airstorm.
+
+Each module can be run on its own, e.g. ``python -m benchmarks.startup``.
+"""
@@ -0,0 +1,58 @@
+"""Measure the overhead of the metrics instrumentation on cache hits."""
+
+import sys
+import timeit
+
+from airstorm.base import Base
+from airstorm.cache import Cache
+
+from .schemas import synthetic_schema
+
+
+class _UninstrumentedCache(Cache):
+    """Cache whose hits are not counted, to compare against. The hit path is the
+    one of `airstorm.cache.Cache.__getitem__` without the metrics."""
+
+    def __getitem__(self, key):
+        if not key or not isinstance(key, str):
+            return dict.__getitem__(self, key)
+        try:
+            value = dict.__getitem__(self, key)
+        except KeyError:
+            return self._miss(key)
+        if self._expiry:
+            return Cache.__getitem__(self, key)
+        if self._lru is not None:
+            self._lru.touch(self, key)
+        return value
+
+
+def main(number=1000000, repeat=5):
+    base = Base("", "", synthetic_schema(table_count=1))
+    model = base.Items0
+    record_id = "rec00000000000000"
+    model._cache[record_id] = {"id": record_id, "fields": {"Name": "Item"}}
+    cache = model._cache
+
+    def measure(function):
+        seconds = min(timeit.repeat(function, number=number, repeat=repeat))
+        return seconds / number * 1e9
+
+    baseline = measure(lambda: dict.__getitem__(cache, record_id))
+    bare = measure(lambda: _UninstrumentedCache.__getitem__(cache, record_id))
+    hit = measure(lambda: Cache.__getitem__(cache, record_id))
+    overhead = hit - bare
+    sys.stdout.write("dict.__getitem__: {:.0f} ns per hit\n".format(baseline))
+    sys.stdout.write(
+        "Cache.__getitem__ without metrics: {:.0f} ns per hit\n".format(bare)
+    )
+    sys.stdout.write("Cache.__getitem__: {:.0f} ns per hit\n".format(hit))
+    sys.stdout.write(
+        "Metrics: {:.0f} ns per hit, {:.1%} of Cache.__getitem__\n".format(
+            overhead, overhead / hit
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
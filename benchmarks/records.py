@@ -0,0 +1,74 @@
+"""Measure the memory and time it takes to materialize many records, with the
+identity map returning existing records instead of allocating duplicates, against
+records without slots nor identity map."""
+
+import sys
+import time
+import tracemalloc
+
+from airstorm.base import Base
+
+from .schemas import synthetic_schema
+
+
+class _BaselineRecord:
+    """Record as materialized without slots nor identity map: each access allocates
+    a new record and its dictionary of attributes."""
+
+    def __init__(self, cache, record_id=""):
+        self._changes = {}
+        self._data = None
+        record = cache.get(record_id) if record_id else None
+        self._record_id = record_id if record else ""
+
+
+def _measure(materialize):
+    """Return the seconds and bytes it takes to call a function, along with its
+    result."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = materialize()
+    seconds = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, size, result
+
+
+def main(record_count=100000, passes=3):
+    base = Base("", "", synthetic_schema(table_count=1, column_count=20))
+    model = base.Items0
+    ids = ["rec{:014d}".format(_) for _ in range(record_count)]
+    # pylint: disable=protected-access
+    cache = model._cache
+    cache.update((_, {"id": _, "fields": {}}) for _ in ids)
+
+    layouts = [
+        ("Baseline", lambda id_: _BaselineRecord(cache, id_)),
+        ("Identity map", model),
+    ]
+    for name, materialize in layouts:
+        seconds, size, records = _measure(lambda: [materialize(_) for _ in ids])
+        sys.stdout.write(
+            "{}: {} records materialized: {:.1f} ms, {:.0f} bytes per record\n".format(
+                name, record_count, seconds * 1000, size / record_count
+            )
+        )
+
+        def again():
+            for _ in range(passes):
+                records_again = [materialize(_) for _ in ids]
+            return records_again
+
+        seconds, size, records_again = _measure(again)
+        shared = sum(a is b for a, b in zip(records, records_again))
+        sys.stdout.write(
+            "{}: {} passes over the same records: {:.1f} ms, {:.1f} MB allocated, "
+            "{} of {} records shared\n".format(
+                name, passes, seconds * 1000, size / 1e6, shared, record_count
+            )
+        )
+        del records, records_again
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Synthetic schemas to benchmark airstorm on large bases."""
+
+
+def synthetic_schema(table_count=80, column_count=20):
+    """Generate a schema where each table has text, number, select and link columns.
+
+    Each table links to the next one, the last table linking to the first one.
+
+    Args:
+        table_count (int, optional): The number of tables.
+        column_count (int, optional): The number of columns per table.
+
+    Returns:
+        dict: The schema.
+    """
+    tables = []
+    for table_index in range(table_count):
+        foreign_index = (table_index + 1) % table_count
+        previous_index = (table_index - 1) % table_count
+        columns = [
+            {"id": _field_id(table_index, 0), "name": "Name", "type": "text"},
+            {
+                "id": _field_id(table_index, 1),
+                "name": "Next Items",
+                "type": "foreignKey",
+                "typeOptions": {
+                    "foreignTableId": _table_id(foreign_index),
+                    "symmetricColumnId": _field_id(foreign_index, 2),
+                    "relationship": "many",
+                },
+            },
+            {
+                "id": _field_id(table_index, 2),
+                "name": "Previous Items",
+                "type": "foreignKey",
+                "typeOptions": {
+                    "foreignTableId": _table_id(previous_index),
+                    "symmetricColumnId": _field_id(previous_index, 1),
+                    "relationship": "many",
+                },
+            },
+        ]
+        for column_index in range(3, column_count):
+            if column_index % 3:
+                type_options = {"format": "decimal", "precision": 2}
+                type_ = "number"
+            else:
+                type_options = {"choices": {}}
+                type_ = "select"
+            columns.append(
+                {
+                    "id": _field_id(table_index, column_index),
+                    "name": "Column {}".format(column_index),
+                    "type": type_,
+                    "typeOptions": type_options,
+                }
+            )
+        for column in columns:
+            column.setdefault("typeOptions", None)
+        tables.append(
+            {
+                "id": _table_id(table_index),
+                "name": "Items {}".format(table_index),
+                "primaryColumnName": "Name",
+                "columns": columns,
+            }
+        )
+    return {"id": "appBenchmark", "name": "Benchmark", "tables": tables}
+
+
+def synthetic_records(schema, record_count=1000):
+    """Generate records for a synthetic schema. Each record links to the record at
+    the same position in the next table, and back.
+
+    Args:
+        schema (dict): The synthetic schema.
+        record_count (int, optional): The number of records per table.
+
+    Returns:
+        dict: The records by table id.
+    """
+    tables = schema["tables"]
+    records_by_table = {}
+    for table_index, table in enumerate(tables):
+        next_index = (table_index + 1) % len(tables)
+        previous_index = (table_index - 1) % len(tables)
+        records = []
+        for index in range(record_count):
+            fields = {
+                "Name": "Item {}".format(index),
+                "Next Items": [record_id(next_index, index)],
+                "Previous Items": [record_id(previous_index, index)],
+            }
+            for column in table["columns"][3:]:
+                if column["type"] == "number":
+                    fields[column["name"]] = index * 0.5
+                else:
+                    fields[column["name"]] = "Choice {}".format(index % 8)
+            records.append({"id": record_id(table_index, index), "fields": fields})
+        records_by_table[table["id"]] = records
+    return records_by_table
+
+
+def record_id(table_index, index):
+    """Return the id of a synthetic record.
+
+    Args:
+        table_index (int): The index of the table of the record.
+        index (int): The index of the record in its table.
+
+    Returns:
+        str: The record id.
+    """
+    return "rec{:03d}{:011d}".format(table_index, index)
+
+
+def _table_id(index):
+    return "tbl{:014d}".format(index)
+
+
+def _field_id(table_index, column_index):
+    return "fld{:07d}{:07d}".format(table_index, column_index)
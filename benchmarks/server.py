@@ -0,0 +1,152 @@
+"""Local stand-in for the Airtable REST API to benchmark airstorm without network
+variance or rate limit concerns."""
+
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from airstorm.formulas import compile_formula, is_true
+
+
+class FakeAirtable:
+    """HTTP server answering Airtable list and get requests from in-memory records.
+
+    Example:
+        >>> with FakeAirtable(schema, records_by_table, latency=0.05) as server:
+        ...     base = Base("app", "key", schema, api_url=server.url)
+
+    Args:
+        schema (dict): The schema of the base, used to evaluate formulas.
+        records_by_table (dict): The records by table id.
+        latency (float, optional): The seconds each request takes to answer.
+        page_size (int, optional): The maximum amount of records per page.
+        throttle_every (int, optional): Answer every nth request with a 429 rate
+            limit error. Never throttles by default.
+    """
+
+    def __init__(
+        self, schema, records_by_table, latency=0.0, page_size=100, throttle_every=0
+    ):
+        object.__init__(self)
+        self.latency = latency
+        self.page_size = page_size
+        self.throttle_every = throttle_every
+        self.requests = 0
+        self.throttled = 0
+        self._columns_by_table = {_["id"]: _["columns"] for _ in schema["tables"]}
+        self._records_by_table = {
+            table_id: {_["id"]: _ for _ in records}
+            for table_id, records in records_by_table.items()
+        }
+        self._formulas = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url(self):
+        """str: The API URL to give to bases."""
+        return "http://127.0.0.1:{}/v0".format(self._server.server_port)
+
+    def start(self):
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        """Reset the request counters."""
+        with self._lock:
+            self.requests = 0
+            self.throttled = 0
+
+    def respond(self, path):
+        """Answer a GET request.
+
+        Args:
+            path (str): The path of the request, with its query.
+
+        Returns:
+            tuple: The status code and data of the response.
+        """
+        with self._lock:
+            self.requests += 1
+            throttle = self.throttle_every and not self.requests % self.throttle_every
+            if throttle:
+                self.throttled += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if throttle:
+            return 429, {"errors": [{"error": {"type": "TOO_MANY_REQUESTS"}}]}
+        url = urlparse(path)
+        parts = url.path.strip("/").split("/")
+        records = self._records_by_table.get(parts[2]) if len(parts) > 2 else None
+        if records is None:
+            return 404, {"error": "NOT_FOUND"}
+        if len(parts) == 4:
+            record = records.get(parts[3])
+            return (200, record) if record else (404, {"error": "NOT_FOUND"})
+        query = parse_qs(url.query)
+        found = list(records.values())
+        formula = query.get("filterByFormula", [""])[0]
+        if formula:
+            function = self._formula(parts[2], formula)
+            found = [_ for _ in found if is_true(function(_))]
+        fields = query.get("fields[]") or query.get("fields")
+        if fields:
+            found = [
+                dict(_, fields={k: v for k, v in _["fields"].items() if k in fields})
+                for _ in found
+            ]
+        page_size = min(int(query.get("pageSize", [self.page_size])[0]), self.page_size)
+        offset = int(query.get("offset", [0])[0])
+        end = offset + page_size
+        data = {"records": found[offset:end]}
+        if end < len(found):
+            data["offset"] = str(end)
+        return 200, data
+
+    def _formula(self, table_id, formula):
+        function = self._formulas.get((table_id, formula))
+        if function is None:
+            function = compile_formula(formula, self._columns_by_table[table_id])
+            self._formulas[(table_id, formula)] = function
+        return function
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        """Handler delegating GET requests to the fake server."""
+
+        # Keeps connections alive like Airtable does.
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):  # noqa: N802
+            status, data = server.respond(self.path)
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            pass
+
+    return Handler
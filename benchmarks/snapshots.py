@@ -0,0 +1,78 @@
+"""Measure the time and memory it takes to load a large base from a JSON dump and
+from a binary snapshot, accessing a fraction of the records."""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from airstorm.base import Base
+
+from .schemas import record_id, synthetic_records, synthetic_schema
+
+
+def main(table_count=4, record_count=50000, accessed=0.01):
+    schema = synthetic_schema(table_count=table_count, column_count=20)
+    base = Base("", "", schema)
+    records_by_table = synthetic_records(schema, record_count)
+    for table_id, records in records_by_table.items():
+        # pylint: disable=protected-access
+        cache = base._model_by_id[table_id]._cache
+        dict.update(cache, ((_["id"], _) for _ in records))
+
+    directory = tempfile.mkdtemp()
+    json_path = os.path.join(directory, "base.json")
+    snapshot_path = os.path.join(directory, "base.snapshot")
+    with open(json_path, "w") as file_:
+        json.dump(records_by_table, file_)
+    base.export_snapshot(snapshot_path)
+    del base
+
+    def load_json():
+        base = Base("", "", schema)
+        with open(json_path) as file_:
+            for table_id, records in json.load(file_).items():
+                # pylint: disable=protected-access
+                cache = base._model_by_id[table_id]._cache
+                dict.update(cache, ((_["id"], _) for _ in records))
+        return base
+
+    def load_snapshot():
+        base = Base("", "", schema)
+        base.load_snapshot(snapshot_path)
+        return base
+
+    step = int(1 / accessed)
+    for name, path, load in (
+        ("JSON", json_path, load_json),
+        ("snapshot", snapshot_path, load_snapshot),
+    ):
+        tracemalloc.start()
+        started = time.perf_counter()
+        base = load()
+        loaded = time.perf_counter() - started
+        for table_index in range(table_count):
+            model = getattr(base, "Items{}".format(table_index))
+            for index in range(0, record_count, step):
+                model(record_id(table_index, index)).name
+        accessed_in = time.perf_counter() - started - loaded
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        sys.stdout.write(
+            "{}: {:.1f} MB file, loaded in {:.1f} ms, {:.0%} of records accessed in "
+            "{:.1f} ms, {:.1f} MB allocated\n".format(
+                name,
+                os.path.getsize(path) / 1e6,
+                loaded * 1000,
+                accessed,
+                accessed_in * 1000,
+                size / 1e6,
+            )
+        )
+        del base
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Measure the time it takes to initialize a base on a large synthetic schema."""
+
+import sys
+import timeit
+
+from airstorm.base import Base
+from airstorm.functions import to_plural, to_singular_pascal_case, to_snake_case
+from airstorm.schemas import compile_schema
+
+from .schemas import synthetic_schema
+
+
+def main(table_count=80, column_count=20, repeat=5):
+    schema = synthetic_schema(table_count, column_count)
+    compiled = compile_schema(schema)
+
+    def lazy(schema):
+        base = Base("", "", schema)
+        # A typical script only touches a couple of tables.
+        return base.Items0, base.Items1List
+
+    def eager(schema):
+        base = Base("", "", schema)
+        return [getattr(base, name) for name in base._table_id_by_name]
+
+    for name, function in (("two tables", lazy), ("all tables", eager)):
+        for kind, schema_ in (("raw", schema), ("compiled", compiled)):
+
+            def run():
+                # Name conversions are memoized, a new process starts without them.
+                for conversion in (to_singular_pascal_case, to_snake_case, to_plural):
+                    conversion.cache_clear()
+                return function(schema_)  # pylint: disable=cell-var-from-loop
+
+            seconds = min(timeit.repeat(run, number=1, repeat=repeat))
+            sys.stdout.write(
+                "{} tables, {} columns, {} schema, {} accessed: {:.1f} ms\n".format(
+                    table_count, column_count, kind, name, seconds * 1000
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
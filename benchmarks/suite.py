@@ -0,0 +1,185 @@
+"""Benchmark airstorm against a local stand-in for the Airtable API, reporting
+the wall time, Airtable operations, HTTP requests and peak memory of each
+scenario.
+
+Example:
+    python -m benchmarks.suite --records 2000 --latency 0.02 --throttle-every 50
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from airstorm.base import Base
+
+from .schemas import synthetic_records, synthetic_schema
+from .server import FakeAirtable
+
+
+def startup(options, _):
+    """Initialize a base on a large schema and access a couple of tables."""
+    schema = synthetic_schema(options.startup_tables, options.columns)
+    base = Base("app", "key", schema, api_url=options.api_url)
+    return base, [base.Items0, base.Items1List]
+
+
+def model_construction(options, base):
+    """Construct a record for each id, from a warm cache."""
+    ids = [_._record_id for _ in base.Items0List.find()]
+    yield
+    yield [base.Items0(_) for _ in ids]
+
+
+def field_traversal(options, base):
+    """Follow a linked record field of each record, one record at a time."""
+    records = base.Items0List.find()
+    yield
+    yield [_.next_items.names for _ in records]
+
+
+def field_list_traversal(options, base):
+    """Follow a linked record field of all records at once, through field lists."""
+    records = base.Items0List.find()
+    yield
+    yield records.next_items
+
+
+def find(options, base):
+    """Find records matching a formula."""
+    yield
+    yield base.Items0List.find("{Column 3} = 'Choice 1'")
+
+
+def list_helpers(options, base):
+    """Filter, group, split and sort records by field."""
+    records = base.Items0List.find()
+    yield
+    field = base.Items0.column_4
+    yield (
+        records.filtered(base.Items0.column_3, "Choice 1"),
+        records.grouped(base.Items0.column_3),
+        records.split(base.Items0.column_3, "Choice 2"),
+        records.sorted(field, reverse=True),
+    )
+
+
+SCENARIOS = (
+    ("Base startup", startup),
+    ("Model construction", model_construction),
+    ("Field.__get__ traversal", field_traversal),
+    ("FieldList.__get__ traversal", field_list_traversal),
+    ("ModelList.find", find),
+    ("Filter, group, split, sort", list_helpers),
+)
+
+
+def run(options):
+    """Run the scenarios against a fake server.
+
+    Args:
+        options (argparse.Namespace): The options of the suite.
+
+    Returns:
+        list: The results of each scenario as dictionaries.
+    """
+    schema = synthetic_schema(options.tables, options.columns)
+    records_by_table = synthetic_records(schema, options.records)
+    results = []
+    with FakeAirtable(
+        schema,
+        records_by_table,
+        latency=options.latency,
+        page_size=options.page_size,
+        throttle_every=options.throttle_every,
+    ) as server:
+        options.api_url = server.url
+        for name, scenario in SCENARIOS:
+            base = Base(
+                "app",
+                "key",
+                schema,
+                api_url=server.url,
+                rate_limit=options.rate_limit,
+            )
+            if scenario is startup:
+                run_ = _startup_runner(scenario, options)
+            else:
+                # Scenarios set up their data before their first yield.
+                steps = scenario(options, base)
+                next(steps)
+                run_ = _step_runner(steps, base)
+            server.reset()
+            # pylint: disable=protected-access
+            operations = base._hits
+            tracemalloc.start()
+            started = time.perf_counter()
+            base = run_()
+            seconds = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append(
+                {
+                    "scenario": name,
+                    "seconds": seconds,
+                    "operations": base._hits - operations,
+                    "requests": server.requests,
+                    "throttled": server.throttled,
+                    "peak_memory": peak,
+                }
+            )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=4)
+    parser.add_argument("--startup-tables", type=int, default=80)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--throttle-every", type=int, default=0)
+    parser.add_argument("--rate-limit", type=float, default=1000.0)
+    parser.add_argument("--output", help="Save the results to a JSON file.")
+    options = parser.parse_args(argv)
+
+    results = run(options)
+    if options.output:
+        with open(options.output, "w") as file_:
+            json.dump({"options": vars(options), "results": results}, file_, indent=4)
+    row = "{:<30} {:>10} {:>10} {:>10} {:>10} {:>12}\n"
+    header = ("Scenario", "Time (ms)", "Hits", "Requests", "Throttled", "Peak (MB)")
+    sys.stdout.write(row.format(*header))
+    for result in results:
+        sys.stdout.write(
+            row.format(
+                result["scenario"],
+                "{:.1f}".format(result["seconds"] * 1000),
+                result["operations"],
+                result["requests"],
+                result["throttled"],
+                "{:.2f}".format(result["peak_memory"] / 1e6),
+            )
+        )
+    return results
+
+
+def _startup_runner(scenario, options):
+    def run_():
+        return scenario(options, None)[0]
+
+    return run_
+
+
+def _step_runner(steps, base):
+    def run_():
+        next(steps)
+        return base
+
+    return run_
+
+
+if __name__ == "__main__":
+    main()
@@ -31,9 +31,12 @@ setup(
         "inflection~=0.5",
     ],
     extras_require={
+        "numpy": ["numpy"],
+        "async": ["httpx>=0.18"],
         "ci": [
             "flake8-print~=3.1",
             "flake8~=3.8",
+            "httpx>=0.18",
             "pep8-naming~=0.11",
             "pytest-cov~=2.10.1",
             "pytest-html~=2.1.1",
@@ -3,13 +3,39 @@
 # pylint: disable=protected-access, missing-function-docstring
 
 import os
+import re
+import copy
 import json
+import time
+import asyncio
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests_mock
+
+from requests.exceptions import HTTPError
 
 from airstorm.base import Base
 from airstorm.model import Model
 from airstorm.model_list import ModelList
 from airstorm.fields import Field
 from airstorm.field_lists import FieldList
+from airstorm.formulas import UnsupportedFormula, compile_formula
+from airstorm.policies import CachePolicy
+from airstorm.scheduler import Scheduler
+from airstorm.schemas import compile_schema, load_compiled_schema
+from airstorm.stores import SqliteStore, Store
+from airstorm.transports import (
+    InProcessTransport,
+    RecordingTransport,
+    ReplayTransport,
+    Transport,
+)
 from airstorm.functions import to_snake_case, to_singular_pascal_case
 
 DIRNAME = os.path.dirname(__file__)
@@ -131,3 +157,813 @@ def test_model_list():
     assert fruits.sorted(base.Fruit.season) == base.FruitList(mango, apple)
     reversed = base.FruitList(apple, mango)
     assert fruits.sorted(base.Fruit.season, reverse=True) == reversed
+
+
+def test_deferred():
+    base = Base("app", "key", SCHEMA)
+    with open(os.path.join(DIRNAME, "resources", "cache.json")) as cache_file:
+        records = list(json.loads(cache_file.read())["Fruit"].values())
+    with requests_mock.Mocker() as mocker:
+        url = "https://api.airtable.com/v0/app/{}".format(base.Fruit._id)
+        mocker.get(url, json={"records": records})
+        with base.Fruit.deferred():
+            apple = base.Fruit("recLSJFOqk6hYiWKg")
+            mango = base.Fruit("recyEwR4TBE89mNsb")
+            missing = base.Fruit("recMissingRecord0")
+            assert base._hits == 0, "Records were not deferred."
+        assert base._hits == 1, "Deferred records were not fetched in batch."
+        assert mocker.call_count == 1
+        formula = mocker.last_request.qs["filterbyformula"][0]
+        assert "record_id()='reclsjfoqk6hyiwkg'" in formula
+    assert apple.name == "Apple" and mango.name == "Mango"
+    assert not missing, "Missing record should not exist."
+
+
+def test_store(tmp_path):
+    store = SqliteStore(str(tmp_path / "store.sqlite"))
+    with open(os.path.join(DIRNAME, "resources", "cache.json")) as cache_file:
+        records = list(json.loads(cache_file.read())["Fruit"].values())
+    with requests_mock.Mocker() as mocker:
+        url = "https://api.airtable.com/v0/app/tbljuMreYC921BZK7"
+        mocker.get(url, json={"records": records})
+        base = Base("app", "key", SCHEMA, indexed_tables=["Fruits"], store=store)
+        assert base._hits == 1, "Indexed table was not downloaded."
+        base = Base("app", "key", SCHEMA, indexed_tables=["Fruits"], store=store)
+        assert base._hits == 0, "Indexed table was not loaded from the store."
+        assert base.Fruit("recLSJFOqk6hYiWKg").name == "Apple"
+        store = SqliteStore(str(tmp_path / "store.sqlite"), max_age=-1)
+        base = Base("app", "key", SCHEMA, indexed_tables=["Fruits"], store=store)
+        assert base._hits == 1, "Stale table was not downloaded again."
+
+    class PartialStore(Store):
+        def load(self, base_id, table_id):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialStore()
+
+
+def test_lazy_models():
+    base = Base("", "", SCHEMA)
+    assert "Smoothy" not in vars(base), "Models should be generated on access."
+    assert base._model_by_id["tblgeI1jinoGzStz2"] is base.Smoothy
+    assert base.SmoothyList._model is base.Smoothy
+    assert "Fruit" not in vars(base), "Unrelated models should not be generated."
+    assert "FruitList" in dir(base)
+
+    # Threads accessing a table for the first time share the same classes.
+    base = Base("", "", SCHEMA)
+    with mock.patch.object(base, "_generate_classes", wraps=base._generate_classes):
+        barrier = threading.Barrier(8)
+
+        def access(_):
+            barrier.wait()
+            return base.Fruit, base._model_list_by_id["tbljuMreYC921BZK7"]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            classes = set(executor.map(access, range(8)))
+        assert base._generate_classes.call_count == 1
+    assert classes == {(base.Fruit, base.FruitList)}
+
+    # Other tables are accessible while an indexed table downloads.
+    downloading = threading.Event()
+    release = threading.Event()
+
+    def handler(method, url, params, json_data):
+        downloading.set()
+        release.wait(5)
+        return 200, {"records": []}
+
+    transport = InProcessTransport(handler)
+    base = Base(
+        "",
+        "",
+        SCHEMA,
+        indexed_tables=["Fruits"],
+        background_indexing=True,
+        transport=transport,
+    )
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        fruit = executor.submit(lambda: base.Fruit)
+        assert downloading.wait(5)
+        assert base.Smoothy._name == "Smoothies"
+        assert not fruit.done(), "Indexed table was not being downloaded."
+        waiting = executor.submit(lambda: base.FruitList)
+        release.set()
+        assert waiting.result()._model is fruit.result()
+
+
+def test_parallel_indexing():
+    with open(os.path.join(DIRNAME, "resources", "cache.json")) as cache_file:
+        cache = json.loads(cache_file.read())
+    with requests_mock.Mocker() as mocker:
+        for model_name, table_id in (
+            ("Fruit", "tbljuMreYC921BZK7"),
+            ("Smoothy", "tblgeI1jinoGzStz2"),
+        ):
+            url = "https://api.airtable.com/v0/app/{}".format(table_id)
+            mocker.get(url, json={"records": list(cache[model_name].values())})
+        tables = ["Fruits", "Smoothies"]
+        base = Base("app", "key", SCHEMA, indexed_tables=tables, index_workers=2)
+        assert base._hits == 2, "Indexed tables were not downloaded."
+        assert base.Smoothy("recxrTqISZmVBvDMs").fruits.names == ["Apple", "Mango"]
+        base = Base(
+            "app", "key", SCHEMA, indexed_tables=tables, background_indexing=True
+        )
+        assert base.wait_indexed(), "Indexed tables were not downloaded."
+        assert base.Smoothy("recxrTqISZmVBvDMs").fruits.names == ["Apple", "Mango"]
+        assert base._hits == 2 and mocker.call_count == 4
+
+
+def test_formulas():
+    record = {
+        "id": "rec1",
+        "fields": {"Name": "Apple", "Price": 2.5, "Tags": ["Red", "Sweet"]},
+    }
+    for formula, expected in (
+        ("{Name} = 'Apple'", True),
+        ('AND(Price > 2, NOT({Name} != "Apple"))', True),
+        ("OR({Missing} = 0, FALSE())", True),
+        ('SEARCH("pl", {Name})', 3),
+        ('SEARCH("x", {Name})', None),
+        ('FIND("x", {Name})', 0),
+        ("RECORD_ID() = 'rec1'", True),
+        ("{Price} * 2 + 1", 6.0),
+        ("ROUND({Price}, 0)", 3),
+        ("LOWER(LEFT({Name}, 3)) & '-' & LEN({Tags})", "app-10"),
+        ('IF({Price} >= 3, "high", "low")', "low"),
+        ('SEARCH("Sweet", {Tags})', 6),
+    ):
+        value = compile_formula(formula)(record)
+        assert value == expected, "{} returned {!r}".format(formula, value)
+    for formula in ("DATETIME_DIFF(NOW(), {Date})", "{Name} = 1", "1 +"):
+        with pytest.raises(UnsupportedFormula):
+            compile_formula(formula)(record)
+
+
+def test_local_find():
+    base = Base("app", "key", SCHEMA)
+    _load_cache(base)
+    apple = base.Fruit("recLSJFOqk6hYiWKg")
+    assert base.FruitList.find("{Season} = 'Winter'") == base.FruitList(apple)
+    assert base.Fruit.find("SEARCH('ang', Name)").name == "Mango"
+    assert base._hits == 0, "Formulas were not evaluated locally."
+    with requests_mock.Mocker() as mocker:
+        url = "https://api.airtable.com/v0/app/tbljuMreYC921BZK7"
+        mocker.get(url, json={"records": []})
+        assert not base.FruitList.find("{Smoothies} = 'Iron Man'")
+    assert base._hits == 1, "Formulas on linked records should query Airtable."
+
+
+def test_field_indexes():
+    base = Base("", "", SCHEMA)
+    _load_cache(base)
+    base.Fruit.create_index(base.Fruit.season)
+    base.Fruit.create_index(base.Fruit.name, ordered=True)
+    fruits = base.FruitList.find()
+    apple = base.Fruit("recLSJFOqk6hYiWKg")
+    mango = base.Fruit("recyEwR4TBE89mNsb")
+    assert fruits.filtered(base.Fruit.season, "Winter") == base.FruitList(apple)
+    assert fruits.grouped(base.Fruit.season)["Summer"] == base.FruitList(mango)
+    assert fruits.ranged(base.Fruit.name, "B", "N") == base.FruitList(mango)
+    assert fruits.sorted(base.Fruit.name, reverse=True) == base.FruitList(mango, apple)
+
+    # Indexes are kept up to date when records are cached.
+    record = copy.deepcopy(base.Fruit._cache[mango._record_id])
+    record["fields"]["Season"] = "Winter"
+    base.Fruit._cache[mango._record_id] = record
+    assert fruits.filtered(base.Fruit.season, "Winter") == fruits
+    assert not fruits.filtered(base.Fruit.season, "Summer")
+
+
+def test_columns():
+    base = Base("", "", SCHEMA)
+    _load_cache(base)
+    smoothies = base.SmoothyList(base.Smoothy("recxrTqISZmVBvDMs"), base.Smoothy())
+    columns = smoothies.columns([base.Smoothy.price, "orders", "name"])
+    assert list(columns["price"]) == [10.0, 0.0]
+    assert list(columns["orders"]) == [0, 0]
+    assert list(columns["name"]) == ["Iron Man", ""]
+    seasons = base.FruitList.find().columns(["season"])["season"]
+    assert seasons.categories == ["Spring", "Summer", "Autumn", "Winter"]
+    assert list(seasons.codes) == [3, 1]
+    assert seasons.decode() == ["Winter", "Summer"]
+
+
+def test_scheduler():
+    scheduler = Scheduler(rate=100, backoff=0.01)
+    base = Base("app", "key", SCHEMA, scheduler=scheduler)
+    url = "https://api.airtable.com/v0/app/tbljuMreYC921BZK7/recLSJFOqk6hYiWKg"
+    with open(os.path.join(DIRNAME, "resources", "cache.json")) as cache_file:
+        record = json.loads(cache_file.read())["Fruit"]["recLSJFOqk6hYiWKg"]
+    with requests_mock.Mocker() as mocker:
+        responses = [{"status_code": 429}, {"status_code": 503}, {"json": record}]
+        mocker.get(url, responses)
+        assert base.Fruit("recLSJFOqk6hYiWKg").name == "Apple"
+    stats = base.scheduler.stats()
+    assert stats["requests"] == 3 and stats["retries"] == 2
+    assert stats["queue_depth"] == 0 and stats["failures"] == 0
+
+    # Requests already waiting for their turn are held back too.
+    scheduler = Scheduler(rate=10)
+    scheduler.acquire()
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        queued = executor.submit(scheduler.acquire)
+        time.sleep(0.05)
+        scheduler.hold(0.3)
+        queued.result()
+    assert time.monotonic() - start >= 0.4, "Queued request was not held back."
+
+    # Creations might have been processed despite a server error.
+    url = "https://api.airtable.com/v0/app/tbljuMreYC921BZK7"
+    fruit = base.Fruit()
+    fruit.name = "Kiwi"
+    created = {"records": [{"id": "recKiwi", "fields": {"Name": "Kiwi"}}]}
+    with requests_mock.Mocker() as mocker:
+        mocker.post(url, [{"status_code": 503}, {"json": created}])
+        with pytest.raises(HTTPError):
+            base.FruitList(fruit).push()
+        assert mocker.call_count == 1, "Creation was retried on a server error."
+    with requests_mock.Mocker() as mocker:
+        mocker.post(url, [{"status_code": 429}, {"json": created}])
+        base.FruitList(fruit).push()
+        assert mocker.call_count == 2, "Creation was not retried on a rate limit."
+    assert fruit._record_id == "recKiwi"
+
+
+def test_metrics():
+    base = Base("app", "key", SCHEMA)
+    events = []
+    base.metrics.subscribe(events.append)
+    url = "https://api.airtable.com/v0/app/tbljuMreYC921BZK7/recLSJFOqk6hYiWKg"
+    with open(os.path.join(DIRNAME, "resources", "cache.json")) as cache_file:
+        record = json.loads(cache_file.read())["Fruit"]["recLSJFOqk6hYiWKg"]
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, json=record)
+        apple = base.Fruit("recLSJFOqk6hYiWKg")
+        assert apple.name == "Apple"
+    metrics = base.metrics.snapshot()["Fruits"]
+    assert metrics["misses"] == 1 and metrics["hits"] >= 1
+    assert metrics["gets"] == 1 and metrics["lists"] == 0
+    assert metrics["requests"] == 1 and metrics["records"] == 1
+    assert metrics["bytes"] > 0 and metrics["latency"]["count"] == 1
+    assert len(events) == 1 and events[0]["table"] == "Fruits"
+    assert base._hits == 1
+
+
+def test_push():
+    base = Base("app", "key", SCHEMA, rate_limit=1000)
+    records = {}
+    for index in range(25):
+        id_ = "rec{:014d}".format(index)
+        records[id_] = {"id": id_, "fields": {"Name": "Fruit", "Season": "Winter"}}
+        base.Fruit._cache[id_] = records[id_]
+    fruits = base.FruitList(*[base.Fruit(_) for _ in records])
+    fruits.names = "Kiwi"
+    assert fruits.names == ["Kiwi"] * 25, "Local changes are not read back."
+    del fruits[1].name
+    assert fruits[1].name == "Fruit", "Local change was not reverted."
+
+    def update(request, context):
+        # pylint: disable=unused-argument
+        updated = []
+        for record in request.json()["records"]:
+            assert record["fields"] == {"Name": "Kiwi"}, "Unchanged fields pushed."
+            updated.append(dict(records[record["id"]], fields=dict(record["fields"])))
+        return {"records": updated}
+
+    url = "https://api.airtable.com/v0/app/tbljuMreYC921BZK7"
+    with requests_mock.Mocker() as mocker:
+        mocker.patch(url, json=update)
+        fruits.push()
+        assert mocker.call_count == 3, "Records were not pushed in batches of 10."
+    assert not fruits[0]._changes and fruits[0].name == "Kiwi"
+    assert base.Fruit._cache[fruits[0]._record_id]["fields"]["Name"] == "Kiwi"
+
+    kiwi = base.Fruit()
+    kiwi.name = "Kiwi"
+    kiwi.smoothies = base.SmoothyList()
+    with requests_mock.Mocker() as mocker:
+        created = {"id": "recKiwi", "fields": {"Name": "Kiwi"}}
+        mocker.post(url, json={"records": [created]})
+        kiwi.push()
+        assert mocker.last_request.json()["records"][0]["fields"] == {
+            "Name": "Kiwi",
+            "Smoothies": [],
+        }
+        mocker.delete(url + "/recKiwi", json={"id": "recKiwi", "deleted": True})
+        assert kiwi and kiwi._record_id == "recKiwi"
+        kiwi.delete()
+        assert not kiwi, "Deleted record still exists."
+        # Records without id nor changes, such as missing ones, are not created.
+        mocker.get(url + "/recMissing", status_code=404)
+        base.FruitList(base.Fruit("recMissing"), base.Fruit()).push()
+        assert mocker.call_count == 3, "Blank records were created."
+
+
+def test_sync():
+    with open(os.path.join(DIRNAME, "resources", "cache.json")) as cache_file:
+        records = list(json.loads(cache_file.read())["Fruit"].values())
+    url = "https://api.airtable.com/v0/app/tbljuMreYC921BZK7"
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, json={"records": records})
+        base = Base("app", "key", SCHEMA, indexed_tables=["Fruits"], rate_limit=1000)
+
+    modified = copy.deepcopy(records[1])
+    modified["fields"]["Season"] = "Spring"
+
+    def list_records(request, context):
+        # pylint: disable=unused-argument
+        if "filterbyformula" in request.qs:
+            formula = request.qs["filterbyformula"][0]
+            assert formula.startswith("is_after(last_modified_time(), '")
+            return {"records": [modified]}
+        # Apple was deleted.
+        assert request.qs["fields[]"] == ["name"], "Listing ids fetched all fields."
+        return {"records": [{"id": modified["id"], "fields": {"Name": "Mango"}}]}
+
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, json=list_records)
+        base.sync()
+        assert mocker.call_count == 2
+    assert base.FruitList.find().seasons == ["Spring"]
+    assert base._hits == 3
+
+
+def test_cache_policy():
+    policy = CachePolicy(max_records=2)
+    base = Base("", "", SCHEMA, cache_policy=policy)
+    _load_cache(base)
+    cache = base.Fruit._cache
+    assert len(cache) == 2
+    cache["recOther"] = {"id": "recOther", "fields": {}}
+    assert len(cache) == 2 and "recLSJFOqk6hYiWKg" not in cache
+    assert base.metrics.snapshot()["Fruits"]["evictions"] == 1
+    # Accessed records are kept over the least recently used ones.
+    assert cache["recyEwR4TBE89mNsb"]
+    cache["recAnother"] = {"id": "recAnother", "fields": {}}
+    assert set(cache) == {"recyEwR4TBE89mNsb", "recAnother"}
+
+    # Budgets can be shared across tables.
+    policy = CachePolicy(max_records=1, shared=True)
+    base = Base("", "", SCHEMA, cache_policy=policy)
+    _load_cache(base)
+    assert len(base.Fruit._cache) + len(base.Smoothy._cache) == 1
+
+
+def test_cache_expiry():
+    policy = CachePolicy(ttl=0.2, negative_ttl=0.1)
+    base = Base("app", "key", SCHEMA, cache_policy=policy, rate_limit=1000)
+    with open(os.path.join(DIRNAME, "resources", "cache.json")) as cache_file:
+        records = list(json.loads(cache_file.read())["Fruit"].values())
+    url = "https://api.airtable.com/v0/app/tbljuMreYC921BZK7"
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url + "/recKiwi", status_code=404)
+        mocker.get(url, json={"records": records})
+        assert not base.Fruit("recKiwi")
+        base.Fruit._cache.fetch_many([_["id"] for _ in records])
+        time.sleep(0.1)
+        assert base.Fruit("recLSJFOqk6hYiWKg"), "Record expired too early."
+        assert mocker.call_count == 2
+        time.sleep(0.1)
+        mocker.get(url, json={"records": records + [{"id": "recKiwi", "fields": {}}]})
+        # All expired records are fetched again in a single request.
+        assert base.Fruit("recKiwi"), "Missing record was cached for too long."
+        assert mocker.call_count == 3
+        formula = mocker.last_request.qs["filterbyformula"][0]
+    assert "record_id()='reclsjfoqk6hyiwkg'" in formula
+    assert base.metrics.snapshot()["Fruits"]["expirations"] == 3
+
+    # Accessing an expired record refetches a bounded batch of expired records.
+    cache = base.Smoothy._cache
+    cache._batch_size = 2
+    ids = ["rec{:014d}".format(_) for _ in range(5)]
+    for id_ in ids:
+        cache[id_] = {"id": id_, "fields": {}}
+    time.sleep(0.2)
+    url = "https://api.airtable.com/v0/app/tblgeI1jinoGzStz2"
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, json={"records": [{"id": _, "fields": {}} for _ in ids]})
+        assert base.Smoothy(ids[3])
+        assert mocker.call_count == 1
+        formula = mocker.last_request.qs["filterbyformula"][0]
+    assert formula.count("record_id()") == 2 and ids[3] in formula
+    assert dict.__contains__(cache, ids[4]), "Unaccessed records were refetched."
+    # Records cached again do not pile up in the expiry heap.
+    for _ in range(100):
+        cache[ids[0]] = {"id": ids[0], "fields": {}}
+    assert len(cache._expiry_heap) <= 2 * len(cache._expiry) + cache._batch_size
+
+
+def test_iter_find():
+    base = Base("app", "key", SCHEMA, rate_limit=1000)
+    with open(os.path.join(DIRNAME, "resources", "cache.json")) as cache_file:
+        records = list(json.loads(cache_file.read())["Fruit"].values())
+    url = "https://api.airtable.com/v0/app/tbljuMreYC921BZK7"
+    pages = [
+        {"json": {"records": records[:1], "offset": "itrNext"}},
+        {"json": {"records": records[1:]}},
+    ]
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, pages)
+        names = [_.name for _ in base.FruitList.iter_find(page_size=1, cache=False)]
+        assert mocker.call_count == 2
+        assert mocker.last_request.qs["offset"] == ["itrnext"]
+    assert names == ["Apple", "Mango"]
+    assert not base.Fruit._cache, "Records were cached."
+
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, pages)
+        fruits = list(base.FruitList.iter_find(page_size=1, prefetch=False))
+    assert [_.name for _ in fruits] == ["Apple", "Mango"]
+    assert set(base.Fruit._cache) == {_["id"] for _ in records}
+
+    # Abandoning the iteration stops the background thread, even when the queue is
+    # full when the last page is fetched.
+    threads = threading.active_count()
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, pages)
+        fruits = base.FruitList.iter_find(page_size=1, cache=False)
+        next(fruits)
+        time.sleep(0.1)
+        fruits.close()
+        deadline = time.monotonic() + 1
+        while threading.active_count() > threads and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert threading.active_count() == threads, "Prefetching thread was leaked."
+
+
+def test_field_projection():
+    base = Base("app", "key", SCHEMA, rate_limit=1000)
+    url = "https://api.airtable.com/v0/app/tbljuMreYC921BZK7"
+    names = [
+        {"id": "recLSJFOqk6hYiWKg", "fields": {"Name": "Apple"}},
+        {"id": "recyEwR4TBE89mNsb", "fields": {"Name": "Mango"}},
+    ]
+    seasons = [
+        {"id": "recLSJFOqk6hYiWKg", "fields": {"Season": "Winter"}},
+        {"id": "recyEwR4TBE89mNsb", "fields": {"Season": "Summer"}},
+    ]
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, json={"records": names})
+        fruits = base.FruitList.find(fields=[base.Fruit.name])
+        assert mocker.last_request.qs["fields[]"] == ["name"]
+        assert fruits.names == ["Apple", "Mango"]
+        assert mocker.call_count == 1, "Projected fields were fetched again."
+        mocker.get(url, json={"records": seasons})
+        # Missing fields are fetched in batch for the whole list.
+        assert fruits.seasons == ["Winter", "Summer"]
+        assert mocker.call_count == 2
+        assert mocker.last_request.qs["fields[]"] == ["season"]
+        assert fruits[0].name == "Apple", "Projected fields were not merged."
+        mocker.get(url, json={"records": seasons[:1]})
+        assert base.Fruit._cache.holds("recLSJFOqk6hYiWKg", "Season")
+        assert not base.Fruit._cache.holds("recLSJFOqk6hYiWKg", "Smoothies")
+        # Missing fields are fetched on access, not defaulted.
+        assert fruits[0].smoothies == base.SmoothyList()
+        assert mocker.call_count == 3
+
+
+def test_prefetch():
+    base = Base("app", "key", SCHEMA, rate_limit=1000)
+    with open(os.path.join(DIRNAME, "resources", "cache.json")) as cache_file:
+        cache = json.loads(cache_file.read())
+    base.Smoothy._cache.update(cache["Smoothy"])
+    other = {"id": "reckgLhuI7SpL6jwK", "fields": {"Name": "Hulk"}}
+    smoothies = base.SmoothyList(base.Smoothy("recxrTqISZmVBvDMs"))
+    url = "https://api.airtable.com/v0/app/"
+    fruits = list(cache["Fruit"].values())
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url + "tbljuMreYC921BZK7", json={"records": fruits})
+        mocker.get(url + "tblgeI1jinoGzStz2", json={"records": [other]})
+        # One request per hop.
+        assert smoothies.prefetch("fruits.smoothies", "fruits.season") is smoothies
+        assert mocker.call_count == 2
+        assert mocker.request_history[1].qs["filterbyformula"] == [
+            "or(record_id()='reckglhui7spl6jwk')"
+        ]
+        names = [_.names for _ in smoothies[0].fruits.smoothies]
+        assert names == [["Iron Man", "Hulk"], ["Iron Man"]]
+        assert mocker.call_count == 2
+    with pytest.raises(ValueError):
+        smoothies.prefetch("name.fruits")
+
+
+def test_fetch_many_chunks():
+    base = Base("app", "key", SCHEMA, rate_limit=1000)
+    ids = ["rec{:014d}".format(_) for _ in range(250)]
+    url = "https://api.airtable.com/v0/app/tbljuMreYC921BZK7"
+
+    def respond(request, _):
+        formula = request.qs["filterbyformula"][0]
+        return {"records": [{"id": _, "fields": {}} for _ in ids if _ in formula]}
+
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, json=respond)
+        fetched = base.Fruit._cache.fetch_many(ids)
+        assert mocker.call_count == 3, "Ids were not fetched a page at a time."
+        assert set(fetched) == set(ids)
+        for request in mocker.request_history:
+            assert "search" not in request.qs["filterbyformula"][0]
+    # Chunks are also bounded by the length of request URLs.
+    cache = base.Smoothy._cache
+    cache._max_url_length = 2000
+    url = "https://api.airtable.com/v0/app/tblgeI1jinoGzStz2"
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, json=respond)
+        cache.fetch_many(ids)
+        assert mocker.call_count > 3
+        assert all(len(_.url) <= 2000 for _ in mocker.request_history)
+    assert base.metrics.snapshot()["Smoothies"]["records"] == len(ids)
+
+
+def test_identity_map():
+    base = Base("", "", SCHEMA)
+    _load_cache(base)
+    fruit = base.Fruit("recLSJFOqk6hYiWKg")
+    assert base.Fruit("recLSJFOqk6hYiWKg") is fruit
+    assert base.Smoothy("recxrTqISZmVBvDMs").fruits[0] is fruit
+    assert not hasattr(fruit, "__dict__"), "Records carry a dictionary."
+    fruit.name = "Pear"
+    assert base.Fruit("recLSJFOqk6hYiWKg").name == "Pear"
+    del fruit
+    # Records with local changes are not collected before they are pushed.
+    smoothy = base.Smoothy("recxrTqISZmVBvDMs")
+    smoothy.fruits.names = "Kiwi"
+    assert smoothy.fruits.names == ["Kiwi", "Kiwi"]
+    assert base.Fruit("recLSJFOqk6hYiWKg").name == "Kiwi"
+    smoothy.fruits.revert()
+    assert "recLSJFOqk6hYiWKg" not in base.Fruit._instances
+    assert base.Fruit() is not base.Fruit()
+
+
+def test_compiled_schema(tmp_path):
+    path = str(tmp_path / "schema.json")
+    compiled = load_compiled_schema(path, SCHEMA)
+    assert compiled == compile_schema(SCHEMA)
+    assert load_compiled_schema(path) == compiled
+    base = Base("", "", compiled)
+    _load_cache(base)
+    smoothie = base.Smoothy("recxrTqISZmVBvDMs")
+    assert str(smoothie) == "Iron Man"
+    assert smoothie.fruits.names == ["Apple", "Mango"]
+    assert base.SmoothyList.created_ons._field is base.Smoothy.created_on
+
+    # Artifacts compiled from another schema are compiled again.
+    schema = copy.deepcopy(SCHEMA)
+    schema["tables"][0]["name"] = "Drinks"
+    base = Base("", "", load_compiled_schema(path, schema))
+    assert base.Drink and not hasattr(base, "Smoothy")
+    assert load_compiled_schema(path)["schema"] == schema
+    with pytest.raises(ValueError):
+        load_compiled_schema(str(tmp_path / "missing.json"))
+
+
+class _StubAirtableHandler(BaseHTTPRequestHandler):
+    """Serve the records of the test cache like Airtable would."""
+
+    records = {}
+    paths = []
+
+    def do_GET(self):  # noqa: N802
+        url = urlparse(self.path)
+        self.paths.append(self.path)
+        parts = url.path.strip("/").split("/")
+        records = self.records.get(parts[2], {})
+        if len(parts) == 4:
+            data = records.get(parts[3])
+            return self._respond(data or {"error": "NOT_FOUND"}, 200 if data else 404)
+        query = parse_qs(url.query)
+        formula = query.get("filterByFormula", [""])[0]
+        ids = re.findall(r"RECORD_ID\(\)='(\w+)'", formula)
+        found = [_ for id_, _ in records.items() if not formula or id_ in ids]
+        offset = int(query.get("offset", [0])[0])
+        page_size = int(query.get("pageSize", [100])[0])
+        data = {"records": found[offset:][:page_size]}
+        if offset + page_size < len(found):
+            data["offset"] = str(offset + page_size)
+        return self._respond(data)
+
+    def _respond(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+def test_async_base():
+    pytest.importorskip("httpx")
+    from airstorm.async_base import AsyncBase  # pylint: disable=import-outside-toplevel
+
+    with open(os.path.join(DIRNAME, "resources", "cache.json")) as cache_file:
+        cache = json.loads(cache_file.read())
+    _StubAirtableHandler.records = {
+        "tblgeI1jinoGzStz2": cache["Smoothy"],
+        "tbljuMreYC921BZK7": cache["Fruit"],
+    }
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubAirtableHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = "http://127.0.0.1:{}/v0".format(server.server_port)
+
+    async def run():
+        base = AsyncBase("app", "key", SCHEMA, api_url=api_url, rate_limit=1000)
+        async with base:
+            smoothie = await base.get(base.Smoothy, "recxrTqISZmVBvDMs")
+            assert smoothie.name == "Iron Man"
+            assert not await base.get(base.Smoothy, "recMissing")
+            fruits = await base.resolve(smoothie, "fruits")
+            assert fruits.names == ["Apple", "Mango"]
+            assert await base.get(base.Fruit, "recLSJFOqk6hYiWKg") is fruits[0]
+            fruits = await base.find(base.Fruit, fields=[base.Fruit.name])
+            assert len(fruits) == 2
+            smoothies = base.SmoothyList(smoothie)
+            await base.prefetch(smoothies, "fruits.smoothies")
+            return base
+
+    try:
+        _StubAirtableHandler.paths = []
+        base = asyncio.run(run())
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert len(_StubAirtableHandler.paths) == 5
+    assert base.metrics.snapshot()["Fruits"]["requests"] == 2
+    # The unknown smoothie linked to apples was prefetched, and cached as missing.
+    assert base.Smoothy._cache["reckgLhuI7SpL6jwK"] == {}
+
+
+def test_snapshot(tmp_path):
+    path = str(tmp_path / "base.snapshot")
+    base = Base("", "", SCHEMA)
+    _load_cache(base)
+    base.Fruit._cache["recLSJFOqk6hYiWKg"]["fields"]["Weight"] = [{"kg": 1.5}, None]
+    base.export_snapshot(path)
+
+    base = Base("", "", SCHEMA)
+    base.load_snapshot(path)
+    cache = base.Smoothy._cache
+    assert "recxrTqISZmVBvDMs" in cache and not dict.__len__(cache)
+    smoothie = base.Smoothy("recxrTqISZmVBvDMs")
+    assert smoothie.name == "Iron Man" and smoothie.price == 10
+    # Only the records accessed are decoded.
+    assert dict.__len__(cache) == 1 and dict.__len__(base.Fruit._cache) == 0
+    assert smoothie.fruits.names == ["Apple", "Mango"]
+    apple = base.Fruit._cache["recLSJFOqk6hYiWKg"]
+    assert apple["fields"]["Weight"] == [{"kg": 1.5}, None]
+    assert base._hits == 0
+
+    # Indexed tables are loaded from the snapshot instead of being downloaded.
+    base = Base("", "", SCHEMA, indexed_tables=["Fruits"], snapshot=path)
+    assert dict.__len__(base.Fruit._cache) == 0
+    assert base.FruitList.find("{Season} = 'Summer'").names == ["Mango"]
+    assert base._hits == 0
+
+
+def test_api_url():
+    base = Base("app", "key", SCHEMA, api_url="http://localhost:8080/v0/")
+    url = "http://localhost:8080/v0/app/tbljuMreYC921BZK7/recLSJFOqk6hYiWKg"
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, json={"id": "recLSJFOqk6hYiWKg", "fields": {"Name": "Apple"}})
+        assert base.Fruit("recLSJFOqk6hYiWKg").name == "Apple"
+
+
+def test_transports(tmp_path):
+    with open(os.path.join(DIRNAME, "resources", "cache.json")) as cache_file:
+        cache = json.loads(cache_file.read())
+    requests = []
+
+    def handler(method, url, params, json_data):
+        requests.append((method, url, params, json_data))
+        record = cache["Fruit"].get(url.rsplit("/", 1)[-1])
+        return (200, record) if record else (404, {"error": "NOT_FOUND"})
+
+    path = str(tmp_path / "recordings.json")
+    transport = RecordingTransport(InProcessTransport(handler), path)
+    base = Base("app", "key", SCHEMA, transport=transport, rate_limit=1000)
+    assert base.Fruit("recLSJFOqk6hYiWKg").name == "Apple"
+    assert base.Smoothy("recxrTqISZmVBvDMs").name == ""
+    # All the tables share the transport of the base.
+    assert base.Fruit._cache._airtable._transport is transport
+    assert len(requests) == 2
+    transport.save()
+
+    base = Base("app", "key", SCHEMA, transport=ReplayTransport(path))
+    assert base.Fruit("recLSJFOqk6hYiWKg").name == "Apple"
+    assert not base.Smoothy("recxrTqISZmVBvDMs")
+    with pytest.raises(LookupError):
+        base.Fruit("recyEwR4TBE89mNsb")
+    assert len(requests) == 2
+
+    class PartialTransport(Transport):
+        def close(self):
+            pass
+
+    with pytest.raises(TypeError):
+        PartialTransport()
+
+
+def test_single_flight():
+    with open(os.path.join(DIRNAME, "resources", "cache.json")) as cache_file:
+        fruits = json.loads(cache_file.read())["Fruit"]
+    requests = []
+
+    def handler(method, url, params, json_data):
+        requests.append(url)
+        time.sleep(0.1)
+        if url.endswith("tbljuMreYC921BZK7"):
+            return 200, {"records": list(fruits.values())}
+        record = fruits.get(url.rsplit("/", 1)[-1])
+        return (200, record) if record else (404, {"error": "NOT_FOUND"})
+
+    base = Base("app", "key", SCHEMA, transport=InProcessTransport(handler))
+    cache = base.Fruit._cache
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        records = list(executor.map(lambda _: cache["recLSJFOqk6hYiWKg"], range(8)))
+    assert len(requests) == 1, "Concurrent misses were not collapsed."
+    assert all(_["fields"]["Name"] == "Apple" for _ in records)
+
+    del requests[:]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(cache.select, "{Season} = 'Summer'")]
+        futures += [executor.submit(cache.fetch_many, ["recyEwR4TBE89mNsb"])]
+        futures += [executor.submit(cache.select, "{Season} = 'Summer'")]
+        futures += [executor.submit(lambda: cache["recyEwR4TBE89mNsb"])]
+        results = [_.result() for _ in futures]
+    assert len(requests) == 2, "Identical requests were not collapsed."
+    assert results[0] is results[2]
+    assert results[3]["fields"]["Name"] == "Mango"
+
+
+def test_shared_store(tmp_path):
+    with open(os.path.join(DIRNAME, "resources", "cache.json")) as cache_file:
+        fruits = json.loads(cache_file.read())["Fruit"]
+    requests = []
+
+    def handler(method, url, params, json_data):
+        requests.append(url)
+        time.sleep(0.1)
+        if url.endswith("tbljuMreYC921BZK7"):
+            return 200, {"records": list(fruits.values())}
+        record = fruits.get(url.rsplit("/", 1)[-1])
+        return (200, record) if record else (404, {"error": "NOT_FOUND"})
+
+    # Bases stand for the worker processes of a host sharing a store.
+    path = str(tmp_path / "store.sqlite")
+    transport = InProcessTransport(handler)
+
+    def start():
+        store = SqliteStore(path, share_records=True)
+        return Base(
+            "app",
+            "key",
+            SCHEMA,
+            indexed_tables=["Fruits"],
+            store=store,
+            transport=transport,
+        )
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        bases = list(executor.map(lambda _: start(), range(4)))
+    assert len(requests) == 1, "Indexed table was downloaded by each worker."
+    assert all(_.Fruit("recyEwR4TBE89mNsb").name == "Mango" for _ in bases)
+
+    # Records fetched by a worker serve the others.
+    del requests[:]
+    store = SqliteStore(path, share_records=True)
+    first = Base("app", "key", SCHEMA, store=store, transport=transport)
+    second = Base("app", "key", SCHEMA, store=store, transport=transport)
+    assert first.Fruit("recLSJFOqk6hYiWKg").name == "Apple"
+    assert second.Fruit("recLSJFOqk6hYiWKg").name == "Apple"
+    second.Fruit._cache.fetch_many(["recLSJFOqk6hYiWKg", "recyEwR4TBE89mNsb"])
+    assert len(requests) == 2
+    assert second.metrics.snapshot()["Fruits"]["shared"] == 1
+    assert first.Fruit._cache.fetch_many(["recyEwR4TBE89mNsb"])
+    assert len(requests) == 2
+
+    # Shared records do not outlive the time to live of caches.
+    store = SqliteStore(str(tmp_path / "expiry.sqlite"), share_records=True)
+    policy = CachePolicy(ttl=0.2)
+    first = Base("app", "key", SCHEMA, store=store, cache_policy=policy)
+    second = Base("app", "key", SCHEMA, store=store, cache_policy=policy)
+    url = "https://api.airtable.com/v0/app/tbljuMreYC921BZK7/recLSJFOqk6hYiWKg"
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, json=fruits["recLSJFOqk6hYiWKg"])
+        assert first.Fruit("recLSJFOqk6hYiWKg").name == "Apple"
+        time.sleep(0.2)
+        renamed = copy.deepcopy(fruits["recLSJFOqk6hYiWKg"])
+        renamed["fields"]["Name"] = "Pear"
+        mocker.get(url.rsplit("/", 1)[0], json={"records": [renamed]})
+        assert first.Fruit("recLSJFOqk6hYiWKg").name == "Pear"
+        time.sleep(0.1)
+        assert second.Fruit("recLSJFOqk6hYiWKg").name == "Pear"
+        assert mocker.call_count == 2
+        # Records expire as long after they were shared as after they are fetched.
+        time.sleep(0.12)
+        assert second.Fruit("recLSJFOqk6hYiWKg").name == "Pear"
+        assert mocker.call_count == 3, "Shared record outlived its time to live."